@@ -21,7 +21,7 @@ from backend.state.abort_signals import (
 # ================================
 
 from langchain_postgres import PGVector
-from langchain_huggingface import HuggingFaceEmbeddings
+from backend.rag.embeddings import get_embeddings
 
 # ================================
 # LLM
@@ -85,6 +85,7 @@ from backend.contracts.ui_events import (
     request_metadata_event,
     model_stage_event,
     error_event,
+    encode_event,
 )
 
 
@@ -122,11 +123,7 @@ class TitleRequest(BaseModel):
 # VECTOR STORE
 # ================================
 
-embedding_model = HuggingFaceEmbeddings(
-    model_name="BAAI/bge-m3",
-    model_kwargs={"device": "cpu"},
-    encode_kwargs={"normalize_embeddings": True},
-)
+embedding_model = get_embeddings()
 
 vector_store = PGVector.from_existing_index(
     embedding=embedding_model,
@@ -140,7 +137,7 @@ vector_store = PGVector.from_existing_index(
 # ================================
 
 def emit_event(event: dict) -> str:
-    return UI_EVENT_PREFIX + json.dumps(event) + "\n"
+    return encode_event(event)
 
 
 def safe_stream_response(
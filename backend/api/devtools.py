@@ -13,7 +13,7 @@ from backend.rag.keyword_search import extract_keywords
 #  NEW: Import retrieval logic for testing
 from backend.rag.retrieve import retrieve_rag_context
 from langchain_postgres import PGVector
-from langchain_huggingface import HuggingFaceEmbeddings
+from backend.rag.embeddings import get_embeddings
 import os
 
 from backend.memory.pg_memory import get_chat_messages
@@ -31,11 +31,7 @@ DB_CONNECTION = os.getenv(
 
 COLLECTION_NAME = "rag_documents"
 
-_embedding_model = HuggingFaceEmbeddings(
-    model_name="BAAI/bge-m3",
-    model_kwargs={"device": "cpu"},
-    encode_kwargs={"normalize_embeddings": True},
-)
+_embedding_model = get_embeddings()
 
 vector_store = PGVector.from_existing_index(
     embedding=_embedding_model,
@@ -1,6 +1,5 @@
 # backend/api/metadata.py
 
-import json
 from typing import Dict, Any, Generator
 
 from fastapi import APIRouter
@@ -10,9 +9,9 @@ from pydantic import BaseModel, Field
 from backend.contracts.ui_events import (
     error_event,
     metadata_confirmed_event,
+    encode_event,
 )
 
-from backend.api.chat import UI_EVENT_PREFIX
 
 from backend.state.job_state import (
     get_job_state,
@@ -63,7 +62,7 @@ class MetadataUpdateRequest(BaseModel):
 # ============================================================
 
 def emit_event(event: dict) -> str:
-    return UI_EVENT_PREFIX + json.dumps(event) + "\n"
+    return encode_event(event)
 
 
 # ============================================================
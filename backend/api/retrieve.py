@@ -1,15 +1,18 @@
 # backend/api/retrieve.py
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 
 from langchain_postgres import PGVector
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 
-import psycopg2
+from backend.rag.embeddings import get_embeddings
+from backend.utils.pg import BlockingPool, execute_prepared
+
+from psycopg2.pool import ThreadedConnectionPool
 import os
+from threading import Lock
 
 
 # ============================================================
@@ -23,7 +26,23 @@ DEFAULT_DB = os.getenv(
 
 COLLECTION_NAME = "rag_documents"
 
-HF_MODEL = "BAAI/bge-m3"
+# Server-side prepared statement (planned once per pooled connection)
+LATEST_REVISION_STMT = "get_latest_revision"
+
+_PREPARE_LATEST_REVISION = f"""
+PREPARE {LATEST_REVISION_STMT} (text) AS
+SELECT MAX((cmetadata->>'revision_number')::int)
+FROM langchain_pg_embedding
+WHERE cmetadata->>'company_document_id' = $1
+"""
+
+# Sized for the sync endpoint's threadpool (anyio default: 40 threads);
+# when all are checked out callers wait instead of failing.
+RETRIEVE_DB_POOL_MAX = int(os.getenv("RETRIEVE_DB_POOL_MAX", "40"))
+RETRIEVE_DB_POOL_TIMEOUT_SEC = float(os.getenv("RETRIEVE_DB_POOL_TIMEOUT_SEC", "30"))
+
+_POOLS: Dict[str, BlockingPool] = {}
+_POOLS_LOCK = Lock()
 
 
 # ============================================================
@@ -56,11 +75,26 @@ def _normalize_conn(conn: str) -> str:
     return conn.replace("postgresql+psycopg2://", "postgresql://")
 
 
-def _get_vector_store(conn: str) -> PGVector:
-    embeddings = HuggingFaceEmbeddings(model_name=HF_MODEL)
+def _get_pool(conn: str) -> BlockingPool:
+    pool = _POOLS.get(conn)
+    if pool is not None:
+        return pool
+
+    with _POOLS_LOCK:
+        pool = _POOLS.get(conn)
+        if pool is None:
+            pool = BlockingPool(
+                ThreadedConnectionPool(1, RETRIEVE_DB_POOL_MAX, _normalize_conn(conn)),
+                RETRIEVE_DB_POOL_MAX,
+                timeout=RETRIEVE_DB_POOL_TIMEOUT_SEC,
+            )
+            _POOLS[conn] = pool
+        return pool
 
+
+def _get_vector_store(conn: str) -> PGVector:
     return PGVector.from_existing_index(
-        embedding=embeddings,
+        embedding=get_embeddings(),
         collection_name=COLLECTION_NAME,
         connection=conn,
     )
@@ -75,21 +109,27 @@ def _get_latest_revision_number(
     Fetch latest revision_number for a document.
     """
 
-    conn = psycopg2.connect(_normalize_conn(connection_string))
-    cur = conn.cursor()
+    pool = _get_pool(connection_string)
+    conn = pool.getconn()
 
-    cur.execute(
-        """
-        SELECT MAX((cmetadata->>'revision_number')::int)
-        FROM langchain_pg_embedding
-        WHERE cmetadata->>'company_document_id' = %s
-        """,
-        (company_document_id,),
-    )
+    def _fetch(cur):
+        cur.execute(
+            f"EXECUTE {LATEST_REVISION_STMT} (%s)",
+            (company_document_id,),
+        )
+        return cur.fetchone()
+
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            row = execute_prepared(
+                conn, cur, LATEST_REVISION_STMT, _PREPARE_LATEST_REVISION, _fetch,
+            )
+    except Exception:
+        pool.putconn(conn, close=True)
+        raise
 
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
+    pool.putconn(conn)
 
     if not row or row[0] is None:
         raise HTTPException(
@@ -1,8 +1,8 @@
 # backend/api/update.py
 
-from typing import Dict, Generator
+from typing import AsyncGenerator, Dict
 from pathlib import Path
-import json
+import asyncio
 
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
@@ -13,15 +13,16 @@ from backend.state.job_state import (
     update_job_metadata,
     mark_job_ready,
 )
-from backend.rag.pipeline import run_pipeline
 from backend.storage.minio_client import upload_pdf as minio_upload_pdf
 from backend.memory.pg_memory import save_active_document
+from backend.state.processed_index import mark_processed
 
 from backend.contracts.ui_events import (
     metadata_confirmed_event,
     error_event,
+    encode_event,
 )
-from backend.api.chat import UI_EVENT_PREFIX
+from backend.api.upload import run_blocking, stream_pipeline
 
 
 # ============================================================
@@ -47,7 +48,7 @@ class MetadataUpdateRequest(BaseModel):
 # ============================================================
 
 def emit_event(event: dict) -> str:
-    return UI_EVENT_PREFIX + json.dumps(event) + "\n"
+    return encode_event(event)
 
 
 def progress(stage: str, msg: str, progress: int) -> str:
@@ -70,7 +71,7 @@ def update_metadata(payload: MetadataUpdateRequest):
     Finalizes metadata and commits document ingestion (STREAMING).
     """
 
-    def stream() -> Generator[str, None, None]:
+    async def stream() -> AsyncGenerator[str, None]:
         try:
             # --------------------------------------------------
             # 1. LOAD JOB
@@ -106,7 +107,7 @@ def update_metadata(payload: MetadataUpdateRequest):
             final_metadata = job.metadata
 
             # --------------------------------------------------
-            # 4. MINIO BACKUP
+            # 4. REQUIRED FIELDS
             # --------------------------------------------------
             rev_val = final_metadata["revision_number"]
             rev_int = int(rev_val) if str(rev_val).isdigit() else 1
@@ -125,25 +126,11 @@ def update_metadata(payload: MetadataUpdateRequest):
                 )
                 return
 
-            yield progress(
-                "upload",
-                f"Backing up {final_metadata['source_file']}…",
-                10,
-            )
-
-            minio_upload_pdf(
-                local_path=final_metadata["pdf_path"],
-                document_id=final_metadata["company_document_id"],
-                revision=rev_int,
-                filename=final_metadata["source_file"],
-                overwrite=True,
-            )
-
-            yield progress("upload", "Backup complete.", 30)
-
             # --------------------------------------------------
-            # 5. RAG PIPELINE
+            # 5. MINIO BACKUP + RAG PIPELINE (CONCURRENT)
             # --------------------------------------------------
+            # The backup (network) and the pipeline (CPU) share only
+            # final_metadata, so they overlap instead of running back to back.
             job_dir = (
                 Path(__file__).resolve().parents[1]
                 / "tmp"
@@ -151,27 +138,88 @@ def update_metadata(payload: MetadataUpdateRequest):
                 / job.job_id
             )
 
+            yield progress(
+                "upload",
+                f"Backing up {final_metadata['source_file']}…",
+                10,
+            )
             yield progress(
                 "processing",
                 "Chunking and embedding document…",
-                60,
+                30,
             )
 
-            run_pipeline(
-                pdf_path=final_metadata["pdf_path"],
-                job_dir=str(job_dir),
-                company_document_id=final_metadata["company_document_id"],
-                db_connection=final_metadata["db_connection"],
-                extra_metadata=final_metadata,
-                mode="commit",
-            )
+            events: asyncio.Queue = asyncio.Queue()
+            BRANCH_DONE = object()
+
+            async def backup() -> None:
+                try:
+                    await run_blocking(
+                        minio_upload_pdf,
+                        local_path=final_metadata["pdf_path"],
+                        document_id=final_metadata["company_document_id"],
+                        revision=rev_int,
+                        filename=final_metadata["source_file"],
+                        overwrite=True,
+                    )
+                    await events.put(("upload", "Backup complete.", 40))
+                except Exception as e:
+                    await events.put(e)
+                finally:
+                    await events.put(BRANCH_DONE)
+
+            async def index() -> None:
+                try:
+                    async for ev in stream_pipeline(
+                        pdf_path=final_metadata["pdf_path"],
+                        job_dir=str(job_dir),
+                        company_document_id=final_metadata["company_document_id"],
+                        db_connection=final_metadata["db_connection"],
+                        extra_metadata=final_metadata,
+                        mode="commit",
+                        reuse_pages_from=str(job_dir / "page1_preview.json"),
+                    ):
+                        # Pipeline PROGRESS (0–100) → 30–90 of this stream
+                        if isinstance(ev, dict) and ev.get("type") == "PROGRESS":
+                            await events.put((
+                                "processing",
+                                ev.get("label") or "Processing…",
+                                30 + int(ev.get("value", 0)) * 60 // 100,
+                            ))
+                    await events.put(("processing", "Indexing complete.", 90))
+                except Exception as e:
+                    await events.put(e)
+                finally:
+                    await events.put(BRANCH_DONE)
+
+            branches = [
+                asyncio.create_task(backup()),
+                asyncio.create_task(index()),
+            ]
 
-            yield progress("processing", "Indexing complete.", 90)
+            # Drain both branches live; progress never goes backwards
+            failures = []
+            pending = len(branches)
+            last_pct = 30
+            while pending:
+                item = await events.get()
+                if item is BRANCH_DONE:
+                    pending -= 1
+                elif isinstance(item, Exception):
+                    failures.append(item)
+                else:
+                    stage, msg, pct = item
+                    last_pct = max(last_pct, pct)
+                    yield progress(stage, msg, last_pct)
+
+            if failures:
+                raise failures[0]
 
             # --------------------------------------------------
             # 6. FINALIZE JOB
             # --------------------------------------------------
-            save_active_document(
+            await run_blocking(
+                save_active_document,
                 session_id=job.session_id,
                 company_document_id=final_metadata["company_document_id"],
                 revision_number=rev_int,
@@ -180,6 +228,17 @@ def update_metadata(payload: MetadataUpdateRequest):
 
             mark_job_ready(job.job_id)
 
+            # Remember content → confirmed metadata (same as commit_upload)
+            await run_blocking(
+                mark_processed,
+                final_metadata.get("content_sha1"),
+                {
+                    k: v for k, v in final_metadata.items()
+                    if k not in ("pdf_path", "db_connection", "content_sha1")
+                },
+                rev_int,
+            )
+
             # --------------------------------------------------
             # 7. CONFIRM TO FRONTEND
             # --------------------------------------------------
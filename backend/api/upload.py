@@ -1,9 +1,15 @@
 # backend/api/upload.py
 
-import shutil
+import io
+import os
+import asyncio
+import hashlib
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Optional, Dict, List
+from threading import Event, Lock
+from typing import Any, AsyncIterator, Optional, Dict, List
 
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from pydantic import BaseModel
@@ -16,18 +22,28 @@ from backend.state.job_state import (
 )
 
 #  Import MinIO Upload Function
-from backend.storage.minio_client import upload_pdf as minio_upload_pdf
+from backend.storage.minio_client import (
+    upload_pdf as minio_upload_pdf,
+    multipart_settings,
+)
 
 #  Import active document persistence
 from backend.state.job_state import save_active_document
 
+#  Content-hash → metadata index (skips phase-1 extraction on re-upload)
+from backend.state.processed_index import is_processed, mark_processed
+
+from backend.utils.log import get_logger
+
 #  Import duplicate checker
-from backend.rag.ingest import metadata_exists
+from backend.rag.ingest import metadata_exists, find_metadata_by_content_hash
 
 # ============================================================
 # CONFIG
 # ============================================================
 
+logger = get_logger(__name__)
+
 BASE_DIR = Path(__file__).resolve().parents[1]  # backend/
 TMP_DIR = BASE_DIR / "tmp" / "jobs"
 UPLOAD_DIR = BASE_DIR / "storage" / "uploads"
@@ -37,26 +53,165 @@ UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 DEFAULT_DB = "postgresql+psycopg2://postgres:1@localhost:5432/rag_db"
 
+# Bounded pool for blocking upload work (disk, MinIO, pipeline, DB).
+# Dedicated (not the loop default) so other to_thread users can't starve it.
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=UPLOAD_WORKERS,
+    thread_name_prefix="upload",
+)
+
+# Chunks embedded + written per COPY batch during commit
+COMMIT_INSERT_BATCH_SIZE = 1024
+
+# Buffer size for the hash + copy loop
+COPY_BUFSIZE = 1 << 20
+
+# Per-document counter file holding the latest allocated revision
+REVISION_COUNTER_FILE = "latest_revision"
+_REVISION_LOCK = Lock()
+
 # ============================================================
 # HELPERS
 # ============================================================
 
+@lru_cache(maxsize=4096)
 def generate_company_document_id(filename: str) -> str:
+    # Pure function of filename → safe to memoize (cache_clear() if needed)
     base = filename.lower().strip()
     return str(uuid.uuid5(uuid.NAMESPACE_DNS, base))
 
 
-def resolve_next_revision_number(doc_dir: Path) -> int:
-    if not doc_dir.exists():
-        return 1
+def _scan_latest_revision(doc_dir: Path) -> int:
+    # Legacy fallback: documents uploaded before the counter file existed.
+    # scandir exposes d_type, so most entries need no extra stat call.
+    best = 0
+    try:
+        with os.scandir(doc_dir) as it:
+            for entry in it:
+                name = entry.name
+                if (
+                    len(name) > 1
+                    and name[0] == "v"
+                    and name[1:].isdigit()
+                    and entry.is_dir(follow_symlinks=False)
+                ):
+                    best = max(best, int(name[1:]))
+    except FileNotFoundError:
+        return 0
+
+    return best
+
 
-    revisions = [
-        int(p.name[1:])
-        for p in doc_dir.iterdir()
-        if p.is_dir() and p.name.startswith("v") and p.name[1:].isdigit()
-    ]
+def resolve_next_revision_number(doc_dir: Path) -> int:
+    """
+    Allocate the next revision for a document.
+
+    O(1): reads/bumps a counter file instead of scanning vN folders.
+    """
+    counter = doc_dir / REVISION_COUNTER_FILE
+
+    with _REVISION_LOCK:
+        try:
+            latest = int(counter.read_text())
+        except (FileNotFoundError, ValueError):
+            latest = _scan_latest_revision(doc_dir)
+
+        next_revision = latest + 1
+
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        tmp = counter.with_suffix(".tmp")
+        tmp.write_text(str(next_revision))
+        os.replace(tmp, counter)
+
+    return next_revision
+
+
+def _save_upload(src, dst: Path) -> str:
+    """
+    Write an uploaded file to disk and return its SHA-1 (hex).
+
+    The bytes are hashed in the same pass that writes them:
+    - Still in memory (SpooledTemporaryFile not rolled) → one write()
+    - Otherwise → reusable 1 MiB buffer, readinto + write
+    """
+    src.seek(0)
+    h = hashlib.sha1()
+
+    with dst.open("wb") as f:
+        if not getattr(src, "_rolled", True):
+            inner = getattr(src, "_file", None)
+            if isinstance(inner, io.BytesIO):
+                data = inner.getbuffer()
+                h.update(data)
+                f.write(data)
+                return h.hexdigest()
+
+        buf = bytearray(COPY_BUFSIZE)
+        view = memoryview(buf)
+        while True:
+            n = src.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+            f.write(view[:n])
+
+    return h.hexdigest()
+
+
+async def run_blocking(fn, *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a blocking call on the upload EXECUTOR.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, partial(fn, *args, **kwargs))
+
+
+_PIPELINE_DONE = object()
+
+
+async def stream_pipeline(**kwargs: Any) -> AsyncIterator[Any]:
+    """
+    Async view of run_pipeline(**kwargs).
+
+    The generator runs on EXECUTOR and hands each event to the event
+    loop as soon as it is produced (nothing is buffered into a list).
+    Pipeline exceptions are re-raised in the consumer.
+
+    If the consumer stops early (break / cancel), the pump stops at the
+    next event, closes run_pipeline, and is awaited before returning, so
+    no EXECUTOR slot is left running an orphaned pipeline.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = Event()
+
+    def pump() -> None:
+        events = run_pipeline(**kwargs)
+        try:
+            for event in events:
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            events.close()
+            loop.call_soon_threadsafe(queue.put_nowait, _PIPELINE_DONE)
+
+    worker = loop.run_in_executor(EXECUTOR, pump)
 
-    return max(revisions) + 1 if revisions else 1
+    try:
+        while True:
+            item = await queue.get()
+            if item is _PIPELINE_DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        await worker
 
 
 # ============================================================
@@ -107,16 +262,14 @@ CONFIDENCE_THRESHOLD = 0.6
 # ============================================================
 
 @router.post("/", response_model=UploadResponse)
-def upload_pdf(
+async def upload_pdf(
     *,
     file: UploadFile = File(...),
     session_id: str = Form(...),
     db_connection: Optional[str] = Form(DEFAULT_DB),
 ):
     # --- LOG START ---
-    print(f"\n------------------------------------------------")
-    print(f"📥 [PHASE 1] Receiving Upload: {file.filename}")
-    print(f"------------------------------------------------")
+    logger.info("📥 [PHASE 1] Receiving Upload: %s", file.filename)
 
     if not session_id or not session_id.strip():
         raise HTTPException(400, "session_id is required")
@@ -142,11 +295,10 @@ def upload_pdf(
     # SAVE PDF LOCALLY
     # --------------------------------------------------------
     try:
-        with pdf_path.open("wb") as f:
-            shutil.copyfileobj(file.file, f)
-        print(f"💾 [PHASE 1] File saved locally: {pdf_path}")
+        content_sha1 = await run_blocking(_save_upload, file.file, pdf_path)
+        logger.info("💾 [PHASE 1] File saved locally: %s", pdf_path)
     except Exception as e:
-        print(f" [PHASE 1] Save Failed: {e}")
+        logger.error("[PHASE 1] Save Failed: %s", e)
         raise HTTPException(500, f"Failed to save PDF: {e}")
 
 
@@ -157,38 +309,62 @@ def upload_pdf(
     metadata: Dict[str, MetadataField] = {}
     missing: List[str] = []
 
-    try:
-        for event in run_pipeline(
-            pdf_path=str(pdf_path),
-            job_dir=str(job_dir),
-            company_document_id=company_document_id,
-            extra_metadata={
-                "company_document_id": company_document_id,
-                "revision_number": str(revision_number),
-                "source_file": file.filename,
-            },
-            mode="metadata",
-        ):
-            # We only care about metadata extraction result
-            if isinstance(event, dict) and event.get("type") == "REQUEST_METADATA":
-                for field in event["fields"]:
-                    key = field["key"]
-                    value = field.get("value")
-                    confidence = field.get("confidence")
-
-                    metadata[key] = MetadataField(
-                        key=key,
-                        value=value,
-                        confidence=confidence,
-                    )
-
-                    # 🔥 CONFIDENCE → MISSING LOGIC
-                    if not value or confidence is None or confidence < CONFIDENCE_THRESHOLD:
-                        missing.append(key)
+    # Trusted pipeline/index output → model_construct (no validation)
+    make_field = MetadataField.model_construct
 
-    except Exception as e:
-        print(f"[PHASE 1] Metadata extraction failed: {e}")
-        raise HTTPException(500, "Metadata extraction failed")
+    # 🔥 Same bytes already indexed? Reuse stored metadata, skip OCR/LLM
+    # Local index first (no network), then the vector DB itself.
+    cached = is_processed(content_sha1) or await run_blocking(
+        find_metadata_by_content_hash,
+        connection_string=db_connection,
+        content_sha1=content_sha1,
+    )
+
+    if cached:
+        logger.info("[PHASE 1] Content hash hit (%s). Skipping metadata pipeline.", content_sha1)
+        for key in ("document_type", "revision_code"):
+            value = cached.get(key)
+            metadata[key] = make_field(
+                key=key,
+                value=value,
+                confidence=1.0 if value else None,
+            )
+            if not value:
+                missing.append(key)
+
+    if not cached:
+        try:
+            async for event in stream_pipeline(
+                pdf_path=str(pdf_path),
+                job_dir=str(job_dir),
+                company_document_id=company_document_id,
+                extra_metadata={
+                    "company_document_id": company_document_id,
+                    "revision_number": str(revision_number),
+                    "source_file": file.filename,
+                },
+                mode="metadata",
+            ):
+                # We only care about metadata extraction result
+                if isinstance(event, dict) and event.get("type") == "REQUEST_METADATA":
+                    # One pass: build field + 🔥 CONFIDENCE → MISSING LOGIC
+                    for f in event["fields"]:
+                        key = f["key"]
+                        value = f.get("value")
+                        conf = f.get("confidence")
+
+                        metadata[key] = make_field(
+                            key=key,
+                            value=value,
+                            confidence=conf,
+                        )
+
+                        if not value or (conf or 0.0) < CONFIDENCE_THRESHOLD:
+                            missing.append(key)
+
+        except Exception as e:
+            logger.error("[PHASE 1] Metadata extraction failed: %s", e)
+            raise HTTPException(500, "Metadata extraction failed")
 
 
     # --------------------------------------------------------
@@ -196,7 +372,8 @@ def upload_pdf(
     # --------------------------------------------------------
     
     # Even if the AI is 100% sure, we check if this specific version exists in DB
-    is_duplicate = metadata_exists(
+    is_duplicate = bool(cached) or await run_blocking(
+        metadata_exists,
         connection_string=db_connection,
         metadata={
             "company_document_id": company_document_id,
@@ -205,7 +382,7 @@ def upload_pdf(
     )
 
     if is_duplicate:
-        print(f"[PHASE 1] Duplicate detected! Forcing metadata popup.")
+        logger.info("[PHASE 1] Duplicate detected! Forcing metadata popup.")
         # Trigger popup by flagging a field as 'missing' even if it isn't
         if "revision_code" not in missing:
             missing.append("revision_code")
@@ -220,13 +397,14 @@ def upload_pdf(
             "source_file": file.filename,
             "pdf_path": str(pdf_path),
             "db_connection": db_connection,
+            "content_sha1": content_sha1,
         },
         missing_fields=missing,
     )
 
     # If missing is NOT empty, frontend will show the form
     next_action = "WAIT_FOR_METADATA" if missing else "READY_FOR_PROCESSING"
-    print(f"👉 [PHASE 1] Decision: {next_action}")
+    logger.info("👉 [PHASE 1] Decision: %s", next_action)
 
     return UploadResponse(
         job_id=job_id,
@@ -245,11 +423,9 @@ def upload_pdf(
 # ============================================================
 
 @router.post("/commit", response_model=CommitResponse)
-def commit_upload(payload: CommitRequest):
+async def commit_upload(payload: CommitRequest):
     # --- LOG START ---
-    print(f"\n------------------------------------------------")
-    print(f"🚀 [PHASE 2] Committing Job: {payload.job_id}")
-    print(f"------------------------------------------------")
+    logger.info("🚀 [PHASE 2] Committing Job: %s", payload.job_id)
 
     job = get_job_state(payload.job_id)
     if not job:
@@ -287,57 +463,87 @@ def commit_upload(payload: CommitRequest):
     job.metadata.update(payload.metadata)
     job.missing_fields = []
 
-    final_metadata = {
-        **job.metadata,
-        **payload.metadata,
-    }
-    
+    # Already merged above; downstream only reads it
+    final_metadata = job.metadata
+
+    rev_val = final_metadata["revision_number"]
+    rev_int = int(rev_val) if str(rev_val).isdigit() else 1
 
     # --------------------------------------------------------
     # 1. UPLOAD TO MINIO
     # --------------------------------------------------------
-    try:
-        print(f"☁️  [MINIO] Uploading: {final_metadata['source_file']} ...")
-        
-        rev_val = final_metadata["revision_number"]
-        rev_int = int(rev_val) if str(rev_val).isdigit() else 1
-
-        minio_path = minio_upload_pdf(
-            local_path=final_metadata["pdf_path"],
-            document_id=final_metadata["company_document_id"],
-            revision=rev_int,
-            filename=final_metadata["source_file"],
-            overwrite=True
-        )
-        print(f"[MINIO] Upload Success! Path: {minio_path}")
-    except Exception as e:
-        print(f"[MINIO] Upload Failed: {e}")
-        raise HTTPException(500, f"MinIO Backup Failed: {e}")
+    async def backup() -> str:
+        try:
+            logger.info("☁️  [MINIO] Uploading: %s ...", final_metadata["source_file"])
+            minio_path = await run_blocking(
+                minio_upload_pdf,
+                local_path=final_metadata["pdf_path"],
+                document_id=final_metadata["company_document_id"],
+                revision=rev_int,
+                filename=final_metadata["source_file"],
+                overwrite=True,
+                **multipart_settings(os.path.getsize(final_metadata["pdf_path"])),
+            )
+            logger.info("[MINIO] Upload Success! Path: %s", minio_path)
+            return minio_path
+        except Exception as e:
+            logger.error("[MINIO] Upload Failed: %s", e)
+            raise HTTPException(500, f"MinIO Backup Failed: {e}")
 
     # --------------------------------------------------------
     # 2. RUN PIPELINE (CHUNKING & DB)
     # --------------------------------------------------------
+    async def index() -> None:
+        try:
+            logger.info("⚙️  [RAG] Starting Chunking & Embedding...")
+            async for _ in stream_pipeline(
+                pdf_path=final_metadata["pdf_path"],
+                job_dir=str(TMP_DIR / payload.job_id),
+                company_document_id=final_metadata["company_document_id"],
+                db_connection=final_metadata["db_connection"],
+                extra_metadata=final_metadata,
+                mode="commit",
+                insert_batch_size=COMMIT_INSERT_BATCH_SIZE,
+                reuse_pages_from=str(TMP_DIR / payload.job_id / "page1_preview.json"),
+            ):
+                pass
+            logger.info("[RAG] Pipeline Complete. Chunks saved to DB.")
+        except Exception as e:
+            logger.error("[RAG] Pipeline Failed: %s", e)
+            raise HTTPException(500, f"Commit failed: {e}")
+
+    # 🔥 Both only read final_metadata → run concurrently
+    minio_task = asyncio.create_task(backup())
+    pipeline_task = asyncio.create_task(index())
+
     try:
-        print(f"⚙️  [RAG] Starting Chunking & Embedding...")
-        for _ in run_pipeline(
-            pdf_path=final_metadata["pdf_path"],
-            job_dir=str(TMP_DIR / payload.job_id),
-            company_document_id=final_metadata["company_document_id"],
-            db_connection=final_metadata["db_connection"],
-            extra_metadata=final_metadata,
-            mode="commit",
-        ):
-            pass
-        print(f" [RAG] Pipeline Complete. Chunks saved to DB.")
-    except Exception as e:
-        print(f" [RAG] Pipeline Failed: {e}")
-        raise HTTPException(500, f"Commit failed: {e}")
+        await asyncio.gather(minio_task, pipeline_task)
+    except Exception:
+        # First failure wins: stop the other branch, then wait until it
+        # has actually finished (the pipeline thread may be mid-COPY) so
+        # a client retry never overlaps a still-running ingest
+        minio_task.cancel()
+        pipeline_task.cancel()
+        await asyncio.gather(minio_task, pipeline_task, return_exceptions=True)
+        raise
 
     #  MARK JOB READY
     mark_job_ready(payload.job_id)
 
+    #  REMEMBER CONTENT → METADATA
+    await run_blocking(
+        mark_processed,
+        final_metadata.get("content_sha1"),
+        {
+            k: v for k, v in final_metadata.items()
+            if k not in ("pdf_path", "db_connection", "content_sha1")
+        },
+        rev_int,
+    )
+
     #  SAVE ACTIVE DOC
-    save_active_document(
+    await run_blocking(
+        save_active_document,
         session_id=job.session_id,
         company_document_id=final_metadata["company_document_id"],
         revision_number=str(final_metadata["revision_number"]),
@@ -7,8 +7,14 @@ is allowed to emit to the frontend.
 Frontend must react ONLY to these events.
 """
 
+from functools import lru_cache
+from math import isfinite
 from typing import List, Dict, Any, Optional
 
+import orjson
+
+from backend.contracts.ui_constants import UI_EVENT_PREFIX
+
 
 # ==========================================================
 # INTERNAL BASE EVENT
@@ -24,11 +30,13 @@ def _base_event(
     Guarantees:
     - Always has a 'type'
     - Payload is always a dict (if present)
+
+    Used for rare events only; hot-path events (progress, stage,
+    confidence) build their dict literal directly.
     """
-    event: Dict[str, Any] = {"type": event_type}
-    if payload is not None:
-        event.update(payload)
-    return event
+    if payload is None:
+        return {"type": event_type}
+    return {"type": event_type, **payload}
 
 
 # ==========================================================
@@ -60,31 +68,30 @@ def request_metadata_event(fields) -> Dict[str, Any]:
     """
 
     safe_fields = fields or []
+    out = []
+
+    for field in safe_fields:
+        if isinstance(field, dict):
+            out.append({
+                "key": field["key"],
+                "label": field.get("label") or _humanize(field),
+                "placeholder": field.get("placeholder"),
+                "reason": field.get("reason"),
+            })
+        else:
+            # Humanize once, reuse for label + placeholder
+            label = _humanize(field)
+            out.append({
+                "key": field,
+                "label": label,
+                "placeholder": f"Enter {label}",
+                "reason": "Missing or low confidence",
+            })
 
     return _base_event(
         "REQUEST_METADATA",
         {
-            "fields": [
-                {
-                    "key": field["key"] if isinstance(field, dict) else field,
-                    "label": (
-                                field.get("label")
-                                if isinstance(field, dict) and field.get("label")
-                                else _humanize(field)
-                            ),
-                    "placeholder": (
-                        field.get("placeholder")
-                        if isinstance(field, dict)
-                        else f"Enter {_humanize(field)}"
-                    ),
-                    "reason": (
-                        field.get("reason")
-                        if isinstance(field, dict)
-                        else "Missing or low confidence"
-                    ),
-                }
-                for field in safe_fields
-            ],
+            "fields": out,
         },
     )
 
@@ -125,20 +132,18 @@ def progress_event(
     - Long-running jobs
     """
 
-    try:
+    # Type check instead of try/except: no traceback on bad input
+    if isinstance(value, (int, float)) and isfinite(value):
         safe_value = int(value)
-    except Exception:
+        safe_value = 0 if safe_value < 0 else 100 if safe_value > 100 else safe_value
+    else:
         safe_value = 0
 
-    safe_value = max(0, min(100, safe_value))
-
-    return _base_event(
-        "PROGRESS",
-        {
-            "value": safe_value,
-            "label": label,
-        },
-    )
+    return {
+        "type": "PROGRESS",
+        "value": safe_value,
+        "label": label,
+    }
 
 
 # ==========================================================
@@ -159,22 +164,18 @@ def answer_confidence_event(
     Rendered as a badge / indicator in UI.
     """
 
-    try:
-        safe_confidence = float(confidence)
-    except Exception:
+    if isinstance(confidence, (int, float)) and isfinite(confidence):
+        safe_confidence = 0.0 if confidence < 0 else 1.0 if confidence > 1 else float(confidence)
+    else:
         safe_confidence = 0.0
 
-    safe_confidence = max(0.0, min(1.0, safe_confidence))
-
     safe_level = level if level in ("high", "medium", "low") else "low"
 
-    return _base_event(
-        "ANSWER_CONFIDENCE",
-        {
-            "confidence": round(safe_confidence, 2),
-            "level": safe_level,
-        },
-    )
+    return {
+        "type": "ANSWER_CONFIDENCE",
+        "confidence": round(safe_confidence, 2),
+        "level": safe_level,
+    }
 
 
 # ==========================================================
@@ -201,14 +202,12 @@ def model_stage_event(
 
     safe_stage = str(stage).lower().strip()
 
-    return _base_event(
-        "MODEL_STAGE",
-        {
-            "stage": safe_stage,
-            "message": message,
-            "model": model,
-        },
-    )
+    return {
+        "type": "MODEL_STAGE",
+        "stage": safe_stage,
+        "message": message,
+        "model": model,
+    }
 
 
 
@@ -224,12 +223,11 @@ def error_event(message: str) -> Dict[str, Any]:
     - stop typing indicator
     - render error state
     """
-    return _base_event(
-        "ERROR",
-        {
-            "message": str(message),
-        },
-    )
+    # Flat literal: no nested payload dict, no merge into a base event
+    return {
+        "type": "ERROR",
+        "message": str(message),
+    }
 
 
 # ==========================================================
@@ -247,7 +245,17 @@ def _humanize(field) -> str:
     else:
         key = str(field)
 
-    return key.replace("_", " ").strip().title()
+    return _humanize_str(key)
+
+
+_UNDERSCORE_TO_SPACE = str.maketrans("_", " ")
+
+
+@lru_cache(maxsize=256)
+def _humanize_str(key: str) -> str:
+    # Field keys are a small fixed set of snake_case identifiers
+    # → cache the formatted label (no surrounding whitespace to strip)
+    return key.translate(_UNDERSCORE_TO_SPACE).title()
 
 # ==========================================================
 # 🟥 NET RATE LIMITED EVENT
@@ -266,13 +274,11 @@ def net_rate_limited_event(
     - show retry timer
     - open NetKeyModal if needed
     """
-    try:
-        retry_after_sec = int(retry_after_sec)
-    except Exception:
+    if isinstance(retry_after_sec, (int, float)) and isfinite(retry_after_sec):
+        retry_after_sec = max(1, int(retry_after_sec))
+    else:
         retry_after_sec = 30
 
-    retry_after_sec = max(1, retry_after_sec)
-
     return _base_event(
         "NET_RATE_LIMITED",
         {
@@ -287,11 +293,25 @@ def text_event(text: str) -> Dict[str, Any]:
         "content": text,
     }
 
+# ==========================================================
+# STREAM ENCODING
+# ==========================================================
+
+def encode_event(event: Dict[str, Any]) -> str:
+    """
+    Serialize a UI event into one stream line.
+
+    orjson encodes straight to UTF-8 bytes (2–5× faster than json.dumps,
+    no intermediate escaping pass); decoded once so the stream framing
+    stays text.
+    """
+    return UI_EVENT_PREFIX + orjson.dumps(event).decode() + "\n"
+
 # ==========================================================
 # PUBLIC EXPORTS (CONTRACT GUARANTEE)
 # ==========================================================
 
-__all__ = [
+__all__ = (
     "system_message_event",
     "request_metadata_event",
     "metadata_confirmed_event",
@@ -301,4 +321,5 @@ __all__ = [
     "answer_confidence_event",
     "error_event",
     "text_event",
-]
+    "encode_event",
+)
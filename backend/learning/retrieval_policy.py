@@ -101,13 +101,9 @@ def validate_policy_result(result: PolicyResult) -> bool:
     """
     Defensive validation before using policy output.
     """
-    if not isinstance(result.chunks, list):
-        return False
+    chunks = result.chunks
 
-    for c in result.chunks:
-        if not isinstance(c, dict):
-            return False
-        if "content" not in c:
-            return False
-
-    return True
+    # isinstance (not `type is`): DB rows may arrive as dict subclasses
+    return isinstance(chunks, list) and all(
+        isinstance(c, dict) and "content" in c for c in chunks
+    )
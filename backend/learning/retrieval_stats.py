@@ -12,13 +12,20 @@ Purpose:
 This is telemetry, not intelligence.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import os
+import atexit
+import queue
+import threading
+import time
 from contextlib import contextmanager
 from datetime import datetime
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import execute_batch
+from psycopg2.pool import ThreadedConnectionPool
+
+from backend.utils.pg import BlockingPool, execute_prepared
 
 
 # =========================================================
@@ -36,32 +43,65 @@ LEARNING_DB_URL = os.getenv(
 MAX_SECTIONS_STORED = 10
 MAX_TYPES_STORED = 5
 
+# Rows are buffered and written in one multi-row INSERT
+FLUSH_BATCH_SIZE = 500
+FLUSH_INTERVAL_SEC = 1.0
+STATS_QUEUE_SIZE = 10_000
+
 
 # =========================================================
-# DB CONNECTION (SAFE)
+# DB CONNECTION (POOLED, SAFE)
 # =========================================================
 
+# Request-path readers (threadpool, up to 40) + the flusher thread;
+# when all are checked out callers wait instead of getting PoolError
+LEARNING_DB_POOL_MAX = int(os.getenv("LEARNING_DB_POOL_MAX", "41"))
+LEARNING_DB_POOL_TIMEOUT_SEC = float(os.getenv("LEARNING_DB_POOL_TIMEOUT_SEC", "30"))
+
+_pool: Optional[BlockingPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> BlockingPool:
+    global _pool
+
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = BlockingPool(
+                ThreadedConnectionPool(1, LEARNING_DB_POOL_MAX, LEARNING_DB_URL),
+                LEARNING_DB_POOL_MAX,
+                timeout=LEARNING_DB_POOL_TIMEOUT_SEC,
+            )
+        return _pool
+
+
 @contextmanager
 def get_connection():
-    conn = None
+    pool = _get_pool()
+    conn = pool.getconn()
+    broken = False
     try:
-        conn = psycopg2.connect(LEARNING_DB_URL)
         yield conn
         conn.commit()
     except Exception:
-        if conn:
+        try:
             conn.rollback()
+        except psycopg2.Error:
+            # Connection itself is dead → don't hand it out again
+            broken = True
         raise
     finally:
-        if conn:
-            conn.close()
+        pool.putconn(conn, close=broken or bool(conn.closed))
 
 
 # =========================================================
 # INIT (SELF-HEALING)
 # =========================================================
 
-def _init_db():
+def _init_db() -> bool:
     query = """
     CREATE TABLE IF NOT EXISTS retrieval_stats (
         id SERIAL PRIMARY KEY,
@@ -88,6 +128,15 @@ def _init_db():
 
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );
+
+    -- get_recent_stats: equality on (doc, rev) + ORDER BY created_at DESC
+    -- LIMIT → backward index scan instead of seq scan + sort
+    CREATE INDEX IF NOT EXISTS retrieval_stats_doc_rev_created_idx
+        ON retrieval_stats (company_document_id, revision_number, created_at DESC);
+
+    -- Global "most recent" analytics
+    CREATE INDEX IF NOT EXISTS retrieval_stats_created_idx
+        ON retrieval_stats (created_at DESC);
     """
 
     try:
@@ -95,50 +144,191 @@ def _init_db():
             with conn.cursor() as cur:
                 cur.execute(query)
         print("Learning DB: retrieval_stats table ready.")
+        return True
     except Exception as e:
         print(f"Retrieval stats DB init warning: {e}")
+        return False
+
+
+# Lazy: no connect + DDL at import time. Runs on the first
+# flush (background thread), retried until it succeeds.
+_init_done = False
+_init_lock = threading.Lock()
 
 
-_init_db()
+def _ensure_db() -> None:
+    global _init_done
+
+    if _init_done:
+        return
+
+    with _init_lock:
+        if not _init_done:
+            _init_done = _init_db()
 
 
 # =========================================================
 # INTERNAL HELPERS
 # =========================================================
 
-def _extract_types(chunks: List[Dict[str, Any]]) -> List[str]:
-    seen = []
+def _extract_types_sections(
+    chunks: List[Dict[str, Any]],
+) -> Tuple[List[str], List[str]]:
+    """
+    Distinct chunk types and sections, first-seen order, one pass.
+    Dict keys give O(1) membership while preserving order.
+    """
+    types: Dict[str, None] = {}
+    sections: Dict[str, None] = {}
+
     for c in chunks:
         t = c.get("chunk_type")
-        if t and t not in seen:
-            seen.append(t)
-        if len(seen) >= MAX_TYPES_STORED:
-            break
-    return seen
-
+        if t and len(types) < MAX_TYPES_STORED:
+            types[t] = None
 
-def _extract_sections(chunks: List[Dict[str, Any]]) -> List[str]:
-    seen = []
-    for c in chunks:
         s = c.get("section")
-        if s and s not in seen:
-            seen.append(s)
-        if len(seen) >= MAX_SECTIONS_STORED:
+        if s and len(sections) < MAX_SECTIONS_STORED:
+            sections[s] = None
+
+        if len(types) >= MAX_TYPES_STORED and len(sections) >= MAX_SECTIONS_STORED:
             break
-    return seen
+
+    return list(types), list(sections)
 
 
 def _score_stats(chunks: List[Dict[str, Any]]) -> Dict[str, Optional[float]]:
-    scores = [c.get("score") for c in chunks if isinstance(c.get("score"), (int, float))]
-    if not scores:
+    # Single pass: no intermediate list, no separate sum/max scans
+    total = 0.0
+    count = 0
+    max_score = float("-inf")
+
+    for c in chunks:
+        score = c.get("score")
+        if isinstance(score, (int, float)):
+            total += score
+            count += 1
+            if score > max_score:
+                max_score = score
+
+    if not count:
         return {"avg": None, "max": None}
 
     return {
-        "avg": round(sum(scores) / len(scores), 4),
-        "max": round(max(scores), 4),
+        "avg": round(total / count, 4),
+        "max": round(max_score, 4),
     }
 
 
+# =========================================================
+# WRITE BUFFER (BATCHED INSERTS)
+# =========================================================
+
+# Server-side prepared INSERT (parsed + planned once per pooled connection)
+INSERT_STMT = "retrieval_stats_ins"
+
+_PREPARE_SQL = f"""
+PREPARE {INSERT_STMT} (
+    TEXT, TEXT, TEXT, TEXT, TEXT, INTEGER, TEXT[], TEXT[],
+    REAL, REAL, REAL, TEXT, INTEGER
+) AS
+INSERT INTO retrieval_stats (
+    session_id,
+    job_id,
+    company_document_id,
+    revision_number,
+    question,
+    chunk_count,
+    chunk_types,
+    sections,
+    avg_score,
+    max_score,
+    confidence,
+    confidence_level,
+    latency_ms
+)
+VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$13)
+"""
+
+_EXECUTE_SQL = f"EXECUTE {INSERT_STMT} (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)"
+
+_STATS_Q: "queue.Queue[Tuple]" = queue.Queue(maxsize=STATS_QUEUE_SIZE)
+_flusher: Optional[threading.Thread] = None
+_flusher_lock = threading.Lock()
+
+
+def _drain(first: Optional[Tuple] = None) -> List[Tuple]:
+    rows = [first] if first is not None else []
+    while len(rows) < FLUSH_BATCH_SIZE:
+        try:
+            rows.append(_STATS_Q.get_nowait())
+        except queue.Empty:
+            break
+    return rows
+
+
+def _write(rows: List[Tuple]) -> None:
+    """
+    Write a batch of rows through the prepared INSERT.
+    """
+    if not rows:
+        return
+
+    _ensure_db()
+
+    try:
+        with get_connection() as conn:
+            with conn.cursor() as cur:
+                # PREPARE once per live connection (re-PREPAREd if the
+                # session lost it); many EXECUTEs per round-trip
+                execute_prepared(
+                    conn,
+                    cur,
+                    INSERT_STMT,
+                    _PREPARE_SQL,
+                    lambda c: execute_batch(c, _EXECUTE_SQL, rows, page_size=FLUSH_BATCH_SIZE),
+                )
+    except Exception as e:
+        # 🔥 Telemetry must NEVER affect production
+        print(f"Failed to record retrieval stats ({len(rows)} rows): {e}")
+
+
+def _flush_loop() -> None:
+    while True:
+        rows = _drain(_STATS_Q.get())
+        _write(rows)
+
+        # Partial batch → let rows accumulate before the next round-trip
+        if len(rows) < FLUSH_BATCH_SIZE:
+            time.sleep(FLUSH_INTERVAL_SEC)
+
+
+def _flush_all() -> None:
+    while True:
+        rows = _drain()
+        if not rows:
+            return
+        _write(rows)
+
+
+def _ensure_flusher() -> None:
+    global _flusher
+
+    if _flusher is not None:
+        return
+
+    with _flusher_lock:
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop,
+                name="retrieval-stats-flush",
+                daemon=True,
+            )
+            _flusher.start()
+
+
+atexit.register(_flush_all)
+
+
 # =========================================================
 # PUBLIC API
 # =========================================================
@@ -166,47 +356,32 @@ def record_retrieval_stats(
 
     try:
         chunk_count = len(rag_chunks)
-        chunk_types = _extract_types(rag_chunks)
-        sections = _extract_sections(rag_chunks)
+        chunk_types, sections = _extract_types_sections(rag_chunks)
         score_stats = _score_stats(rag_chunks)
 
-        with get_connection() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    INSERT INTO retrieval_stats (
-                        session_id,
-                        job_id,
-                        company_document_id,
-                        revision_number,
-                        question,
-                        chunk_count,
-                        chunk_types,
-                        sections,
-                        avg_score,
-                        max_score,
-                        confidence,
-                        confidence_level,
-                        latency_ms
-                    )
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                    """,
-                    (
-                        session_id,
-                        job_id,
-                        company_document_id,
-                        str(revision_number),
-                        question,
-                        chunk_count,
-                        chunk_types,
-                        sections,
-                        score_stats["avg"],
-                        score_stats["max"],
-                        confidence,
-                        confidence_level,
-                        latency_ms,
-                    ),
-                )
+        row = (
+            session_id,
+            job_id,
+            company_document_id,
+            str(revision_number),
+            question,
+            chunk_count,
+            chunk_types,
+            sections,
+            score_stats["avg"],
+            score_stats["max"],
+            confidence,
+            confidence_level,
+            latency_ms,
+        )
+
+        # Fire-and-forget: the background flusher owns the DB round-trip
+        _ensure_flusher()
+        try:
+            _STATS_Q.put_nowait(row)
+        except queue.Full:
+            # DB is behind; dropping telemetry beats blocking an answer
+            pass
     except Exception as e:
         # 🔥 Telemetry must NEVER affect production
         print(f"Failed to record retrieval stats: {e}")
@@ -216,26 +391,47 @@ def record_retrieval_stats(
 # READ (OPTIONAL – ANALYTICS)
 # =========================================================
 
+_RECENT_STATS_COLUMNS = (
+    "session_id",
+    "job_id",
+    "chunk_count",
+    "chunk_types",
+    "sections",
+    "avg_score",
+    "max_score",
+    "confidence",
+    "confidence_level",
+    "latency_ms",
+    "created_at",
+)
+
+_RECENT_STATS_SQL = f"""
+SELECT {", ".join(_RECENT_STATS_COLUMNS)}
+FROM retrieval_stats
+WHERE company_document_id = %s
+  AND revision_number = %s
+ORDER BY created_at DESC
+LIMIT %s
+"""
+
+
 def get_recent_stats(
     *,
     company_document_id: str,
     revision_number: str,
     limit: int = 100,
 ) -> List[Dict[str, Any]]:
+    # Explicit columns (no question text / ids on the wire) and a plain
+    # tuple cursor; dicts are zipped once against a fixed key tuple.
     try:
         with get_connection() as conn:
-            with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            with conn.cursor() as cur:
                 cur.execute(
-                    """
-                    SELECT *
-                    FROM retrieval_stats
-                    WHERE company_document_id = %s
-                      AND revision_number = %s
-                    ORDER BY created_at DESC
-                    LIMIT %s
-                    """,
+                    _RECENT_STATS_SQL,
                     (company_document_id, str(revision_number), limit),
                 )
-                return cur.fetchall() or []
+                rows = cur.fetchall()
     except Exception:
         return []
+
+    return [dict(zip(_RECENT_STATS_COLUMNS, row)) for row in rows]
@@ -0,0 +1,160 @@
+# backend/llm/answer_cache.py
+"""
+Answer cache (question + evidence → final answer).
+
+Design:
+- Keyed by model, generation settings (max_tokens, intent → the
+  prompt/length path), normalized question, chat-history tail and the
+  context chunks in prompt (retrieval) order
+- Same evidence + same question → same answer, no prefill/decode
+- A session re-asking the exact same thing is a retry → always
+  regenerated (and the fresh answer replaces the cached one)
+- Bounded LRU with TTL (stale answers expire, memory stays flat)
+- Process-local, thread-safe, never raises
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import os
+import threading
+import time
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))  # 0 disables
+ANSWER_CACHE_TTL_SEC = float(os.getenv("ANSWER_CACHE_TTL_SEC", "600"))
+
+# Prompt only ever sees the last 4 history turns
+HISTORY_TURNS = 4
+
+# Sessions whose last served key is remembered (retry detection)
+RETRY_TRACKED_SESSIONS = 4096
+
+
+# ============================================================
+# STORE
+# ============================================================
+
+_cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+_last_key: "OrderedDict[str, str]" = OrderedDict()  # session → last key asked
+_LOCK = threading.Lock()
+
+
+def _fingerprint(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest()
+
+
+def _cache_key(
+    model_id: str,
+    question: str,
+    chunks: Optional[List[Dict[str, str]]],
+    history: Optional[List[Dict[str, str]]],
+    max_tokens: Optional[int],
+    intent: Optional[str],
+) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(model_id.encode("utf-8"))
+    h.update(b"\0")
+    h.update(f"{max_tokens}\0{intent}".encode("utf-8"))
+    h.update(b"\0")
+    h.update(" ".join(question.lower().split()).encode("utf-8"))
+
+    for c in chunks or ():
+        h.update(_fingerprint(c.get("content") or ""))
+
+    for msg in (history or [])[-HISTORY_TURNS:]:
+        h.update(b"\0")
+        h.update(str(msg.get("role")).encode("utf-8"))
+        h.update(_fingerprint(str(msg.get("content") or "")))
+
+    return h.hexdigest()
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def _is_retry(session_id: Optional[str], key: str) -> bool:
+    # Caller holds _LOCK
+    if not session_id:
+        return False
+
+    retry = _last_key.get(session_id) == key
+    _last_key[session_id] = key
+    _last_key.move_to_end(session_id)
+    while len(_last_key) > RETRY_TRACKED_SESSIONS:
+        _last_key.popitem(last=False)
+    return retry
+
+
+def lookup(
+    *,
+    model_id: str,
+    question: str,
+    chunks: Optional[List[Dict[str, str]]] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+    max_tokens: Optional[int] = None,
+    intent: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Return a cached answer, or None on miss / expiry / retry.
+    """
+    if ANSWER_CACHE_SIZE <= 0 or not question:
+        return None
+
+    try:
+        key = _cache_key(model_id, question, chunks, history, max_tokens, intent)
+        now = time.monotonic()
+
+        with _LOCK:
+            if _is_retry(session_id, key):
+                return None
+
+            entry = _cache.get(key)
+            if entry is None:
+                return None
+
+            stored_at, answer = entry
+            if now - stored_at > ANSWER_CACHE_TTL_SEC:
+                del _cache[key]
+                return None
+
+            _cache.move_to_end(key)
+            return answer
+    except Exception as e:
+        print(f"[ANSWER CACHE] Lookup failed: {e}")
+        return None
+
+
+def store(
+    *,
+    model_id: str,
+    question: str,
+    answer: str,
+    chunks: Optional[List[Dict[str, str]]] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+    max_tokens: Optional[int] = None,
+    intent: Optional[str] = None,
+    session_id: Optional[str] = None,
+) -> None:
+    """
+    Remember a fully generated answer.
+    """
+    if ANSWER_CACHE_SIZE <= 0 or not question or not answer:
+        return
+
+    try:
+        key = _cache_key(model_id, question, chunks, history, max_tokens, intent)
+
+        with _LOCK:
+            _cache[key] = (time.monotonic(), answer)
+            _cache.move_to_end(key)
+            while len(_cache) > ANSWER_CACHE_SIZE:
+                _cache.popitem(last=False)
+    except Exception as e:
+        print(f"[ANSWER CACHE] Store failed: {e}")
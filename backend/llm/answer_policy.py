@@ -14,26 +14,32 @@ PHASE 2 FIXES:
 """
 
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
+import re
 
 
 # ============================================================
 # DATA STRUCTURES
 # ============================================================
 
-@dataclass
+@dataclass(frozen=True)
 class AnswerStyle:
     """
     EXACT object expected by generate.py
+
+    Frozen: one shared instance per intent (see decide_answer_style).
     """
     verbosity: str              # "one_line" | "short" | "normal" | "detailed"
     needs_refinement: bool
 
 
-@dataclass
+@dataclass(frozen=True)
 class AnswerIntent:
     """
     Internal policy-level intent (NOT sent to the LLM)
+
+    Frozen: instances are memoized and shared between callers.
     """
     use_rag: bool
     use_deliberation: bool
@@ -45,6 +51,50 @@ class AnswerIntent:
     strict_factual: bool
 
 
+# ============================================================
+# PHRASE MATCHERS (COMPILED ONCE)
+# ============================================================
+# One alternation per category → one C-level scan instead of a
+# Python loop of substring checks. Plain alternation (no \b) keeps
+# the original substring / prefix semantics exactly:
+#   .match  == str.startswith(tuple)
+#   .search == any(term in q for term in terms)
+
+_CONVERSATIONAL = frozenset({
+    "hi", "hello", "hey",
+    "thanks", "thank you",
+    "ok", "okay", "cool",
+})
+
+
+def _any_of(*terms: str) -> "re.Pattern[str]":
+    return re.compile("|".join(map(re.escape, terms)))
+
+
+_FOLLOW_UP_RE = _any_of(
+    "explain again", "why", "how", "clarify", "again", "above", "previous",
+)
+
+_DEFINITION_RE = _any_of("what is", "define", "meaning of")
+
+_FACT_LOOKUP_RE = _any_of(
+    "what is the", "what are the", "state", "list", "give",
+    "how much", "maximum", "minimum", "how many",
+)
+
+_REASONING_RE = _any_of("why", "how", "explain", "compare", "describe", "detail")
+
+_VAGUE_RE = _any_of("this", "that", "it", "same", "above", "previous")
+
+_BRIEF_RE = _any_of("in short", "brief", "one line")
+
+_DETAILED_RE = _any_of(
+    "explain fully", "detailed", "in detail",
+    "more detail", "more info", "elaborate",
+    "not getting any knowledge", "expand on", "tell me more",
+)
+
+
 # ============================================================
 # CORE POLICY ENGINE
 # ============================================================
@@ -58,69 +108,45 @@ def infer_answer_policy(
     Infers HOW the system should answer (not WHAT to answer).
     """
 
-    q = (question or "").strip().lower()
+    # History only matters as present/absent → small, hot cache key
+    return _infer_cached(
+        (question or "").strip().lower(),
+        bool(previous_question),
+        bool(previous_answer),
+    )
+
+
+@lru_cache(maxsize=2048)
+def _infer_cached(
+    q: str,
+    previous_question: bool,
+    previous_answer: bool,
+) -> AnswerIntent:
     word_count = len(q.split())
 
     # --------------------------------------------------------
     # 0️⃣ CONVERSATIONAL DETECTION (🔥 EARLY & AUTHORITATIVE)
     # --------------------------------------------------------
 
-    conversational_set = {
-        "hi", "hello", "hey",
-        "thanks", "thank you",
-        "ok", "okay", "cool"
-    }
-
-    is_conversational = q in conversational_set
+    is_conversational = q in _CONVERSATIONAL
 
     # --------------------------------------------------------
     # 1️⃣ FOLLOW-UP DETECTION
     # --------------------------------------------------------
 
-    follow_up_triggers = (
-        "explain again",
-        "why",
-        "how",
-        "clarify",
-        "again",
-        "above",
-        "previous",
-    )
-
     is_follow_up = bool(
-        previous_question and any(t in q for t in follow_up_triggers)
+        previous_question and _FOLLOW_UP_RE.search(q)
     )
 
     # --------------------------------------------------------
     # 2️⃣ QUESTION TYPE CLASSIFICATION
     # --------------------------------------------------------
 
-    is_definition = q.startswith((
-        "what is",
-        "define",
-        "meaning of",
-    ))
-
-    is_fact_lookup = q.startswith((
-        "what is the",
-        "what are the",
-        "state",
-        "list",
-        "give",
-        "how much",
-        "maximum",
-        "minimum",
-        "how many",
-    ))
-
-    is_reasoning = q.startswith((
-        "why",
-        "how",
-        "explain",
-        "compare",
-        "describe",
-        "detail",
-    ))
+    is_definition = _DEFINITION_RE.match(q) is not None
+
+    is_fact_lookup = _FACT_LOOKUP_RE.match(q) is not None
+
+    is_reasoning = _REASONING_RE.match(q) is not None
 
     is_vague = word_count <= 3 and not is_conversational
 
@@ -128,10 +154,9 @@ def infer_answer_policy(
     # 3️⃣ CONTEXT DEPENDENCY
     # --------------------------------------------------------
 
-    vague_terms = ("this", "that", "it", "same", "above", "previous")
     needs_context = (
         not is_conversational
-        and (any(v in q for v in vague_terms) or is_follow_up)
+        and (_VAGUE_RE.search(q) is not None or is_follow_up)
     )
 
     # --------------------------------------------------------
@@ -153,16 +178,12 @@ def infer_answer_policy(
         verbosity = "short"
 
     # Explicit overrides
-    if any(p in q for p in ("in short", "brief", "one line")):
+    if _BRIEF_RE.search(q):
         verbosity = "one_line"
 
     #  FIX: Explicitly trigger DETAILED mode for elaboration requests
     # This prevents response_policy.py from cutting off the answer.
-    if any(p in q for p in (
-        "explain fully", "detailed", "in detail", 
-        "more detail", "more info", "elaborate",
-        "not getting any knowledge", "expand on", "tell me more"
-    )):
+    if _DETAILED_RE.search(q):
         verbosity = "detailed"
 
     # --------------------------------------------------------
@@ -246,13 +267,23 @@ def infer_answer_policy(
 def decide_answer_style(
     question: str,
     context_chunks=None,
+    intent: Optional[AnswerIntent] = None,
 ) -> AnswerStyle:
     """
     Thin wrapper for generation.
+
+    Pass an already inferred `intent` to skip re-classifying.
     """
 
-    intent = infer_answer_policy(question)
+    if intent is None:
+        intent = infer_answer_policy(question)
+
+    return _style_for(intent)
+
 
+@lru_cache(maxsize=256)
+def _style_for(intent: AnswerIntent) -> AnswerStyle:
+    # AnswerIntent is frozen/hashable and itself memoized → tiny key space
     return AnswerStyle(
         verbosity=intent.verbosity,
         needs_refinement=intent.needs_refinement,
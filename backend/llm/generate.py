@@ -10,12 +10,16 @@ CRITICAL GUARANTEES:
 - Net-safe (rate + concurrency guarded)
 """
 
+import io
 import os
+import re
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from typing import List, Dict, Optional, Literal, Generator
 
 import torch
-import json
-from backend.state.abort_signals import is_aborted
+from backend.state.abort_signals import is_aborted, ABORT_CHECK_EVERY
 from backend.llm.loader import get_llm, hf_stream_generate
 from backend.llm.net_loader import generate_net_answer_stream, NetRateLimitError
 from backend.llm.net_models import get_active_net_provider, NET_MAX_TOKENS
@@ -29,9 +33,12 @@ from backend.llm.prompts import (
     clean_model_output,
 )
 from backend.llm.answer_policy import decide_answer_style, infer_answer_policy
+from backend.llm import answer_cache
+from backend.llm.stream_coalesce import coalesce_tokens
 from backend.llm.response_policy import apply_response_policy
-from backend.contracts.ui_events import text_event
+from backend.contracts.ui_events import text_event, encode_event
 from backend.contracts.ui_constants import UI_EVENT_PREFIX
+from backend.utils.log import get_logger
 
 
 
@@ -39,55 +46,130 @@ from backend.contracts.ui_constants import UI_EVENT_PREFIX
 
 ADVANCED_REASONING = os.getenv("ADVANCED_REASONING", "0").lower() in ("1", "true", "yes")
 
+# Per-token / per-request debug output (off: zero cost on the token loop)
+_TOKEN_DEBUG = os.getenv("KB_TOKEN_DEBUG") == "1"
+
+logger = get_logger(__name__, logging.DEBUG if _TOKEN_DEBUG else logging.INFO)
+
+# Overlaps get_llm() with prompt preparation (see the LITE section)
+_LLM_PREFETCH = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm-prefetch")
+
+# Fixed fallback messages → serialized once at import, not per request
+_EVT_NO_QUESTION = encode_event(text_event("Please ask a question."))
+_EVT_NET_NO_SESSION = encode_event(text_event("Session required for Net mode."))
+_EVT_DOC_ERROR = encode_event(text_event("Error while processing documents."))
+_EVT_MODEL_UNAVAILABLE = encode_event(text_event("Model unavailable."))
+_EVT_GENERATION_FAILED = encode_event(text_event("Generation failed."))
+_EVT_EMPTY_ANSWER = encode_event(text_event("How can I help you?"))
+
 
 # ============================================================
 # DEVICE
 # ============================================================
 
+FORCE_CPU = os.getenv("KAVIN_FORCE_CPU", "0").lower() in ("1", "true", "yes")
+
+
+@lru_cache(maxsize=1)
 def _has_gpu() -> bool:
+    # Lazy + cached: the first CUDA probe can take hundreds of ms,
+    # so it no longer runs at import (and never on forced-CPU hosts)
+    if FORCE_CPU:
+        return False
     try:
         return torch.cuda.is_available()
     except Exception:
         return False
 
 
-HAS_GPU = _has_gpu()
-
 LITE_RANK_1 = "lite_llama_8b"
 LITE_RANK_2 = "lite_qwen_q4"
 
 BASE_RANK_GPU = "base_qwen_7b"
 BASE_RANK_CPU = "base_qwen_3b"
-BASE_RANK = BASE_RANK_GPU if HAS_GPU else BASE_RANK_CPU
+
+
+def __getattr__(name: str):
+    # HAS_GPU / BASE_RANK stay importable, resolved on first access
+    if name == "HAS_GPU":
+        return _has_gpu()
+    if name == "BASE_RANK":
+        return BASE_RANK_GPU if _has_gpu() else BASE_RANK_CPU
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ============================================================
 # HELPERS
 # ============================================================
 
+_CONV_INTENTS = frozenset({"greeting", "conversation", "confirmation", "chitchat", "fast"})
+
+
 def _is_conversational(intent: Optional[str]) -> bool:
-    return intent in ("greeting", "conversation", "confirmation", "chitchat", "fast")
+    return intent in _CONV_INTENTS
+
+
+_BAD_ANSWER_RE = re.compile(
+    "i am an ai"
+    "|i cannot answer"
+    "|not provided in the document"
+    "|no information available",
+    re.IGNORECASE,
+)
 
 
 def _is_bad_answer(text: str) -> bool:
     if not text:
         return True
-    t = text.strip().lower()
-    return any(
-        bad in t
-        for bad in (
-            "i am an ai",
-            "i cannot answer",
-            "not provided in the document",
-            "no information available",
-        )
-    )
+    # One case-insensitive scan; no lowercased copy of the answer
+    return _BAD_ANSWER_RE.search(text) is not None
+
+
+class _ChunkIdsKey:
+    """
+    Cache key that hashes/compares by chunk ids only, but carries the
+    chunks so a miss can build the text. Chunks are dropped once used.
+    """
+    __slots__ = ("ids", "chunks")
+
+    def __init__(self, ids: tuple, chunks):
+        self.ids = ids
+        self.chunks = chunks
+
+    def __hash__(self) -> int:
+        return hash(self.ids)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, _ChunkIdsKey) and self.ids == other.ids
+
+
+def _join_context(chunks) -> str:
+    # One dict lookup per chunk; join a real list (sized once)
+    parts: List[str] = []
+    append = parts.append
+    for c in chunks:
+        content = c.get("content")
+        if content:
+            append(content)
+    return "\n\n".join(parts)
+
+
+@lru_cache(maxsize=256)
+def _context_to_text_cached(key: _ChunkIdsKey) -> str:
+    text = _join_context(key.chunks)
+    key.chunks = None
+    return text
 
 
 def _context_to_text(chunks: Optional[List[Dict[str, str]]]) -> str:
     if not chunks:
         return ""
-    return "\n\n".join(c["content"] for c in chunks if c.get("content"))
+
+    # Retries / follow-ups over the same chunk ids reuse the joined text
+    ids = tuple(c.get("id") for c in chunks)
+    if None in ids:
+        return _join_context(chunks)
+    return _context_to_text_cached(_ChunkIdsKey(ids, chunks))
 
 
 def _build_prompt(question, model, context_chunks, chat_history):
@@ -100,6 +182,10 @@ def _build_prompt(question, model, context_chunks, chat_history):
 # MAIN STREAM GENERATOR
 # ============================================================
 
+# Cache hits are replayed in small segments so the UI still streams
+CACHED_SEGMENT_CHARS = 40
+
+
 def generate_answer_stream(
     *,
     question: str,
@@ -110,6 +196,70 @@ def generate_answer_stream(
     max_tokens: int = 1024,
     session_id: Optional[str] = None,
 ) -> Generator[str, None, None]:
+    """
+    Answer cache in front of the model: same question + same evidence
+    (+ same history tail, max_tokens and intent) replays the previous
+    answer without any prefill/decode. A session re-asking the same
+    question is treated as a retry and regenerated. Only clean, complete
+    (not aborted, not rejected by _is_bad_answer) answers are stored.
+    """
+    cache_args = dict(
+        model_id=model_id,
+        question=question,
+        chunks=context_chunks,
+        history=chat_history,
+        max_tokens=max_tokens,
+        intent=intent,
+        session_id=session_id,
+    )
+
+    cached = answer_cache.lookup(**cache_args)
+    if cached is not None:
+        for i in range(0, len(cached), CACHED_SEGMENT_CHARS):
+            yield cached[i:i + CACHED_SEGMENT_CHARS]
+        return
+
+    # Single growing buffer instead of a list of token strings
+    answer_buf = io.StringIO()
+    cacheable = True
+
+    for chunk in coalesce_tokens(_generate_uncached(
+        question=question,
+        model_id=model_id,
+        context_chunks=context_chunks,
+        intent=intent,
+        chat_history=chat_history,
+        max_tokens=max_tokens,
+        session_id=session_id,
+    )):
+        if not chunk or chunk.startswith(UI_EVENT_PREFIX):
+            # Abort close ("") / errors / notices / rate limits are never cached
+            if cacheable:
+                cacheable = False
+                answer_buf.close()
+        elif cacheable:
+            answer_buf.write(chunk)
+        yield chunk
+
+    if not cacheable or (session_id and is_aborted(session_id)):
+        return
+
+    answer = answer_buf.getvalue()
+    answer_buf.close()
+    if answer.strip() and not _is_bad_answer(answer):
+        answer_cache.store(answer=answer, **cache_args)
+
+
+def _generate_uncached(
+    *,
+    question: str,
+    model_id: str,
+    context_chunks: Optional[List[Dict[str, str]]] = None,
+    intent: Optional[str] = None,
+    chat_history: Optional[List[Dict[str, str]]] = None,
+    max_tokens: int = 1024,
+    session_id: Optional[str] = None,
+) -> Generator[str, None, None]:
      
     
     # Resolve chat mode from model_id
@@ -121,38 +271,37 @@ def generate_answer_stream(
         model = "net"
 
     # --- DEBUG: VERIFY CHUNKS ---
-    chunk_count = len(context_chunks) if context_chunks else 0
-    print(f"🧩 [GENERATE DEBUG] Context chunks = {chunk_count}")
-    if chunk_count > 0:
-        print(f"   - First Chunk Sample: {str(context_chunks[0])[:50]}...")
+    if _TOKEN_DEBUG:
+        chunk_count = len(context_chunks) if context_chunks else 0
+        logger.debug("🧩 [GENERATE DEBUG] Context chunks = %d", chunk_count)
+        if chunk_count > 0:
+            logger.debug("   - First Chunk Sample: %.50s...", str(context_chunks[0]))
     # ----------------------------
 
     # ---------------------------
     # HARD GUARANTEE: at least one yield
     # ---------------------------
     yielded_anything = False
-    collected: List[str] = []
+    # Only "did we stream any non-whitespace text?" is ever asked of the
+    # output → track a flag instead of retaining every token
+    has_text = False
+    is_conv = _is_conversational(intent)
 
 
 
     if not question:
-        yield UI_EVENT_PREFIX + json.dumps(
-            text_event("Please ask a question.")
-        ) + "\n"
+        yield _EVT_NO_QUESTION
 
         
         return
 
-    policy = infer_answer_policy(question)
-    style = decide_answer_style(question, context_chunks)
-    context_text = _context_to_text(context_chunks)
-
     # ========================================================
     # BASE / NET (DOCUMENT-AWARE)
     # ========================================================
 
     if model in ("base", "net"):
-        if not context_chunks and _is_conversational(intent):
+        # Conversational + no docs → straight to lite, before any prompt work
+        if not context_chunks and is_conv:
             model = "lite"
             model_id = "lite_llama_8b"
         else:
@@ -161,20 +310,18 @@ def generate_answer_stream(
             try:
                 if model == "net":
                     if not session_id:
-                        yield UI_EVENT_PREFIX + json.dumps(
-                           text_event("Session required for Net mode.")
-                          ) + "\n"
+                        yield _EVT_NET_NO_SESSION
                         return
                     try:
                         provider = get_active_net_provider()
 
-                        for token in generate_net_answer_stream(
+                        for i, token in enumerate(generate_net_answer_stream(
                             prompt=prompt,
                             provider=provider,
                             variant="default",
                             max_tokens=min(max_tokens, NET_MAX_TOKENS),
-                        ):
-                            if is_aborted(session_id):
+                        )):
+                            if i % ABORT_CHECK_EVERY == 0 and is_aborted(session_id):
                                 break
                             if token:
                                 yield token
@@ -186,35 +333,32 @@ def generate_answer_stream(
                             _, provider = msg.split(":", 1)
 
                         
-                        yield "__UI_EVENT__" + json.dumps(
+                        yield encode_event(
                             net_rate_limited_event(
                                 retry_after_sec=30,
                                 provider=provider,
                             )
-                        ) + "\n"
+                        )
                         return
 
                 else:
-                    for t in hf_stream_generate(
+                    for i, t in enumerate(hf_stream_generate(
                         model_id=model_id,
                         prompt=prompt,
                         max_new_tokens=max_tokens,
                         session_id=session_id,
-                    ):
-                        if session_id and is_aborted(session_id):
+                    )):
+                        if session_id and i % ABORT_CHECK_EVERY == 0 and is_aborted(session_id):
                             yield ""  # allow UI to close stream cleanly
                             return
                         if t:
                             yielded_anything = True   # ✅ REQUIRED
-                            collected.append(t)      # ✅ REQUIRED
                             yield t
 
 
 
             except Exception:
-                yield UI_EVENT_PREFIX + json.dumps(
-                    text_event("Error while processing documents.")
-                ) + "\n"
+                yield _EVT_DOC_ERROR
                 return
 
             if not yielded_anything:
@@ -225,17 +369,26 @@ def generate_answer_stream(
     # LITE / FAST
     # ========================================================
 
-    if _is_conversational(intent):
+    # Model (possibly a cold load) resolves in the background while the
+    # policy / style / prompt work below runs on this thread
+    llm_future = _LLM_PREFETCH.submit(get_llm, model_id)
+
+    # Policy/style only shape lite prompts → not computed for base/net
+    policy = infer_answer_policy(question)
+    style = decide_answer_style(question, context_chunks, intent=policy)
+
+    if is_conv:
         max_tokens = min(max_tokens, 128)
 
     # -------- Advanced reasoning (optional)
-    if ADVANCED_REASONING and not _is_conversational(intent):
+    if ADVANCED_REASONING and not is_conv:
         try:
             from backend.llm.orchestrator import deliberate_answer
 
             final = deliberate_answer(
                 question=question,
-                context_text=context_text,
+                # Only this path needs the joined context → build lazily
+                context_text=_context_to_text(context_chunks),
                 reasoner_models=[LITE_RANK_2, LITE_RANK_1],
                 verifier_models=[],
                 editor_model=LITE_RANK_1,
@@ -244,9 +397,9 @@ def generate_answer_stream(
             )
 
             if final and not _is_bad_answer(final):
-                yield UI_EVENT_PREFIX + json.dumps(
+                yield encode_event(
                     text_event(apply_response_policy(final, verbosity=style.verbosity))
-                ) + "\n"
+                )
                 return
         except Exception:
             pass
@@ -269,19 +422,17 @@ def generate_answer_stream(
         prompt = f"User: {question}\nAssistant:"
     
     try:
-        llm = get_llm(model_id)
+        llm = llm_future.result()
     except Exception:
-        yield UI_EVENT_PREFIX + json.dumps(
-            text_event("Model unavailable.")
-        ) + "\n"
+        yield _EVT_MODEL_UNAVAILABLE
         return
 
    
 
     try:
         if llm["type"] == "gguf":
-            for chunk in llm["llm"](prompt, max_tokens=max_tokens):
-                if session_id and is_aborted(session_id):
+            for i, chunk in enumerate(llm["llm"](prompt, max_tokens=max_tokens)):
+                if session_id and i % ABORT_CHECK_EVERY == 0 and is_aborted(session_id):
                     yield ""
                     return
                 text = ""
@@ -291,35 +442,34 @@ def generate_answer_stream(
                     text = chunk
 
                 if text:
-                    print("TOKEN:", repr(text))  # ✅ NOW SAFE
-                    collected.append(text)
+                    if _TOKEN_DEBUG:
+                        logger.debug("TOKEN: %r", text)
+                    if not has_text and not text.isspace():
+                        has_text = True
                     yield text
 
 
         else:
-            for t in hf_stream_generate(
+            for i, t in enumerate(hf_stream_generate(
                 model_id=model_id,
                 prompt=prompt,
                 max_new_tokens=max_tokens,
                 session_id=session_id,
-            ):
-                if session_id and is_aborted(session_id):
+            )):
+                if session_id and i % ABORT_CHECK_EVERY == 0 and is_aborted(session_id):
                     yield ""  # allow UI to close stream cleanly
                     return
                 if t:
-                    collected.append(t)
+                    if not has_text and not t.isspace():
+                        has_text = True
                     yield t
 
 
     except Exception:
-        yield UI_EVENT_PREFIX + json.dumps(
-            text_event("Generation failed.")
-        ) + "\n"
+        yield _EVT_GENERATION_FAILED
         return
 
-    if not collected or not "".join(collected).strip():
-        yield UI_EVENT_PREFIX + json.dumps(
-            text_event("How can I help you?")
-        ) + "\n"
+    if not has_text:
+        yield _EVT_EMPTY_ANSWER
 
         return
\ No newline at end of file
@@ -0,0 +1,116 @@
+# backend/llm/intent_batcher.py
+
+"""
+Dynamic micro-batching for the zero-shot intent classifier.
+
+Design:
+- Callers block on a Future (chat handlers run in worker threads)
+- ONE worker thread owns the classifier (pipelines are not re-entrant)
+- Worker takes the first waiting question, then collects more for up
+  to BATCH_WAIT_MS / MAX_BATCH_SIZE and runs a single batched forward
+- Idle cost: one parked thread; single-request latency: +BATCH_WAIT_MS
+"""
+
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import os
+import queue
+import threading
+import time
+
+from backend.llm.loader import load_intent_classifier
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+MAX_BATCH_SIZE = int(os.getenv("INTENT_BATCH_SIZE", "16"))
+BATCH_WAIT_MS = float(os.getenv("INTENT_BATCH_WAIT_MS", "2"))
+
+
+# ============================================================
+# WORKER
+# ============================================================
+
+_requests: "queue.Queue[Tuple[str, Sequence[str], Future]]" = queue.Queue()
+_worker: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+def _collect_batch() -> List[Tuple[str, Sequence[str], Future]]:
+    batch = [_requests.get()]
+    deadline = time.monotonic() + BATCH_WAIT_MS / 1000.0
+
+    while len(batch) < MAX_BATCH_SIZE:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(_requests.get(timeout=remaining))
+        except queue.Empty:
+            break
+
+    return batch
+
+
+def _run_batch(batch: List[Tuple[str, Sequence[str], Future]]) -> None:
+    # Same label set → one pipeline call; anything else runs on its own
+    groups: Dict[Tuple[str, ...], List[Tuple[str, Future]]] = {}
+    for question, labels, fut in batch:
+        groups.setdefault(tuple(labels), []).append((question, fut))
+
+    for labels, items in groups.items():
+        try:
+            classifier = load_intent_classifier()
+            results = classifier(
+                sequences=[q for q, _ in items],
+                candidate_labels=list(labels),
+                multi_label=False,
+            )
+            if isinstance(results, dict):
+                results = [results]
+
+            for (_, fut), result in zip(items, results):
+                fut.set_result(result)
+        except Exception as e:
+            for _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+
+
+def _worker_loop() -> None:
+    while True:
+        _run_batch(_collect_batch())
+
+
+def _ensure_worker() -> None:
+    global _worker
+
+    if _worker is not None:
+        return
+
+    with _worker_lock:
+        if _worker is None:
+            _worker = threading.Thread(
+                target=_worker_loop,
+                name="intent-batcher",
+                daemon=True,
+            )
+            _worker.start()
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def classify_batched(question: str, candidate_labels: Sequence[str]) -> Dict[str, Any]:
+    """
+    Zero-shot classify one question, sharing a forward pass with any
+    concurrent callers. Returns the pipeline's result dict.
+    """
+    _ensure_worker()
+
+    fut: Future = Future()
+    _requests.put((question, candidate_labels, fut))
+    return fut.result()
@@ -15,8 +15,9 @@ Design goals:
 """
 
 from typing import Literal
+import re
 
-from backend.llm.loader import load_intent_classifier
+from backend.llm.intent_batcher import classify_batched
 from backend.llm.text_normalizer import token_count
 
 
@@ -70,6 +71,17 @@ _FOLLOW_UP_TRIGGERS = {
     "more detail", "detail about", 
 }
 
+# One compiled pass each instead of a Python loop over the sets.
+# Longest alternatives first so "good morning" wins over shorter ones.
+_GREETING_RE = re.compile(
+    r"(?:"
+    + "|".join(re.escape(g) for g in sorted(_GREETINGS, key=len, reverse=True))
+    + r")\b"
+)
+_FOLLOW_UP_RE = re.compile(
+    "|".join(re.escape(t) for t in sorted(_FOLLOW_UP_TRIGGERS, key=len, reverse=True))
+)
+
 
 def _fast_intent_check(question: str) -> Intent | None:
     """
@@ -81,14 +93,14 @@ def _fast_intent_check(question: str) -> Intent | None:
     if not q:
         return "fact_lookup"
 
-    if any(q.startswith(g) for g in _GREETINGS):
+    if _GREETING_RE.match(q):
         return "greeting"
 
     tokens = token_count(q)
 
     # Short contextual follow-ups
     # "tell me more details" (4 tokens) should be caught
-    if tokens <= 5 and any(t in q for t in _FOLLOW_UP_TRIGGERS):
+    if tokens <= 5 and _FOLLOW_UP_RE.search(q):
         return "follow_up"
 
     # Single-word confirmations should NOT block RAG
@@ -121,15 +133,9 @@ def classify_intent(question: str) -> Intent:
         return fast
 
     # --------------------------------------------------------
-    # 2️⃣ ZERO-SHOT CLASSIFICATION
+    # 2️⃣ ZERO-SHOT CLASSIFICATION (BATCHED ACROSS REQUESTS)
     # --------------------------------------------------------
-    classifier = load_intent_classifier()
-
-    result = classifier(
-        sequences=question,
-        candidate_labels=CANDIDATE_LABELS,
-        multi_label=False,
-    )
+    result = classify_batched(question, CANDIDATE_LABELS)
 
     labels = result.get("labels", [])
     scores = result.get("scores", [])
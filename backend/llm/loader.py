@@ -11,9 +11,14 @@ PHASE 2 GUARANTEES:
 """
 
 import os
+import queue
 import threading
+import time
+import hashlib
 import traceback
-from typing import Dict, Any, Generator, Tuple, Optional, Iterable
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Dict, Any, Generator, List, Tuple, Optional, Iterable
 
 import torch
 
@@ -23,6 +28,11 @@ try:
 except Exception:
     Llama = None
 
+try:
+    from llama_cpp import LlamaRAMCache
+except Exception:
+    LlamaRAMCache = None
+
 try:
     from transformers import (
         AutoTokenizer,
@@ -33,7 +43,17 @@ try:
 except Exception:
     AutoTokenizer = AutoModelForCausalLM = TextIteratorStreamer = pipeline = None
 
-from backend.state.abort_signals import is_aborted
+try:
+    from transformers.generation.streamers import BaseStreamer
+    from transformers.generation.stopping_criteria import (
+        StoppingCriteria,
+        StoppingCriteriaList,
+    )
+except Exception:
+    BaseStreamer = StoppingCriteria = object
+    StoppingCriteriaList = None
+
+from backend.state.abort_signals import is_aborted, ABORT_CHECK_EVERY
 
 
 # ============================================================
@@ -84,7 +104,28 @@ HF_MODELS: Dict[str, str] = {
     "base_qwen_3b": "Qwen/Qwen2.5-3B-Instruct",
 }
 
-INTENT_CLASSIFIER_MODEL = "facebook/bart-large-mnli"
+# Any zero-shot (NLI) checkpoint in the HF cache; a distilled MNLI model
+# (e.g. a MiniLM / DeBERTa-small NLI) is several times faster than BART.
+INTENT_CLASSIFIER_MODEL = os.getenv("INTENT_CLASSIFIER_MODEL", "facebook/bart-large-mnli")
+
+# CPU only: dynamic INT8 quantization of the classifier's Linear layers
+INTENT_CLASSIFIER_INT8 = os.getenv("INTENT_CLASSIFIER_INT8", "1").lower() in ("1", "true", "yes")
+
+# Per-model RAM cache of llama.cpp KV states, keyed by prompt prefix.
+# Prompts sharing a prefix (system turn + history) load the saved state
+# instead of re-running that part of prefill. 0 disables.
+# The budget is PER LOADED GGUF MODEL: total RAM = this × models in memory.
+GGUF_PROMPT_CACHE_MB = int(os.getenv("GGUF_PROMPT_CACHE_MB", "256"))
+
+# CUDA only: torch.compile(mode="reduce-overhead") for HF decode.
+# Opt-in: the static KV cache + CUDA graphs are shared per model, so
+# generate() calls on a compiled model are serialized, and each new
+# prompt length still recompiles prefill on the request path.
+HF_TORCH_COMPILE = os.getenv("HF_TORCH_COMPILE", "0").lower() in ("1", "true", "yes")
+
+# Stream pieces grouped per yielded dict (see _gguf_stream_wrapper)
+GGUF_BATCH_TOKENS = max(1, int(os.getenv("GGUF_BATCH_TOKENS", "4")))
+GGUF_BATCH_MAX_MS = float(os.getenv("GGUF_BATCH_MAX_MS", "8"))
 
 
 # ============================================================
@@ -95,6 +136,7 @@ _lock = threading.RLock()
 _llama_cache: Dict[str, Any] = {}
 _hf_model_cache: Dict[str, Any] = {}
 _hf_tokenizer_cache: Dict[str, Any] = {}
+_hf_generate_locks: Dict[str, threading.Lock] = {}  # compiled models only
 _intent_classifier: Optional[Any] = None
 
 
@@ -130,11 +172,28 @@ def _load_gguf(model_id: str) -> Any:
             verbose=False,
         )
 
+        if LlamaRAMCache is not None and GGUF_PROMPT_CACHE_MB > 0:
+            llm.set_cache(LlamaRAMCache(capacity_bytes=GGUF_PROMPT_CACHE_MB << 20))
+
         _llama_cache[model_id] = llm
         print(f"GGUF model loaded [{model_id}] | gpu_layers={gpu_layers}")
         return llm
 
 
+def _gguf_item_text(item: Any) -> str:
+    if isinstance(item, dict):
+        try:
+            return item.get("choices", [{}])[0].get("text") or ""
+        except Exception:
+            return ""
+    if isinstance(item, str):
+        return item
+    try:
+        return str(item)
+    except Exception:
+        return ""
+
+
 def _gguf_stream_wrapper(
     llm_instance: Any,
     prompt: str,
@@ -161,24 +220,35 @@ def _gguf_stream_wrapper(
 
     yielded = False
 
-    for item in gen:
-        if session_id and is_aborted(session_id):
+    # Pull-ahead: group up to GGUF_BATCH_TOKENS pieces into one dict.
+    # A piece arriving >= GGUF_BATCH_MAX_MS after the last emit flushes
+    # at once → slow models stream per token, fast ones pay 1/4 the yields
+    batch: List[str] = []
+    last_emit = time.monotonic()
+
+    for i, item in enumerate(gen):
+        if session_id and i % ABORT_CHECK_EVERY == 0 and is_aborted(session_id):
             print(f"[GGUF] Abort detected for session {session_id}")
             break
 
-        if isinstance(item, dict):
-            yielded = True
-            yield item
-        elif isinstance(item, str):
-            yielded = True
-            yield {"choices": [{"text": item}]}
-        else:
-            try:
-                s = str(item)
-            except Exception:
-                s = ""
+        text = _gguf_item_text(item)
+        if not text:
+            continue
+        batch.append(text)
+
+        now = time.monotonic()
+        if (
+            len(batch) >= GGUF_BATCH_TOKENS
+            or (now - last_emit) * 1000.0 >= GGUF_BATCH_MAX_MS
+        ):
             yielded = True
-            yield {"choices": [{"text": s}]}
+            yield {"choices": [{"text": "".join(batch)}]}
+            batch = []
+            last_emit = now
+
+    if batch:
+        yielded = True
+        yield {"choices": [{"text": "".join(batch)}]}
 
     # 🔥 FINAL SAFETY YIELD
     if not yielded:
@@ -189,6 +259,39 @@ def _gguf_stream_wrapper(
 # HF (transformers) LOADER + STREAM
 # ============================================================
 
+def _compile_hf(model_id: str, model: Any, tokenizer: Any) -> None:
+    """
+    CUDA-graph the decode step: torch.compile(reduce-overhead) on forward
+    + a static KV cache (fixed shapes → one capture, replayed per token).
+    A 1-token warm-up pays the compile at load, not on the first user.
+    The static cache lives on the model (reset per generate), so a
+    compiled model gets a generate lock. Any failure restores eager forward.
+    """
+    eager_forward = model.forward
+    try:
+        model.generation_config.cache_implementation = "static"
+        model.forward = torch.compile(
+            eager_forward,
+            mode="reduce-overhead",
+            fullgraph=False,
+        )
+
+        warm = tokenizer("Hello", return_tensors="pt").to(model.device)
+        with torch.inference_mode():
+            model.generate(
+                **warm,
+                max_new_tokens=1,
+                do_sample=False,
+                pad_token_id=tokenizer.eos_token_id,
+            )
+        _hf_generate_locks[model_id] = threading.Lock()
+        print(f"HF model compiled [{model_id}]")
+    except Exception as e:
+        model.forward = eager_forward
+        model.generation_config.cache_implementation = None
+        print(f"HF compile skipped [{model_id}]: {e}")
+
+
 def _load_hf(model_id: str) -> Tuple[Any, Any]:
     if AutoTokenizer is None or AutoModelForCausalLM is None:
         raise RuntimeError("transformers not installed")
@@ -225,6 +328,9 @@ def _load_hf(model_id: str) -> Tuple[Any, Any]:
 
         model.eval()
 
+        if DEVICE == "cuda" and HF_TORCH_COMPILE:
+            _compile_hf(model_id, model, tokenizer)
+
         _hf_model_cache[model_id] = model
         _hf_tokenizer_cache[model_id] = tokenizer
 
@@ -232,6 +338,176 @@ def _load_hf(model_id: str) -> Tuple[Any, Any]:
         return model, tokenizer
 
 
+# Decode every N generated tokens (BPE decode is the main per-token
+# cost outside the forward pass); poll interval for a dead/aborted worker.
+HF_DECODE_EVERY = int(os.getenv("HF_DECODE_EVERY", "4"))
+HF_STREAM_POLL_SEC = 0.5
+
+_STREAM_END = object()
+
+# Tokenized-prompt cache: retries / edits of the last turn resend the
+# same multi-thousand-token prompt → skip re-running BPE on it.
+PROMPT_TOKEN_CACHE_SIZE = 64
+PROMPT_TOKEN_CACHE_TTL_SEC = 120.0
+
+_prompt_token_cache: "OrderedDict[Tuple[str, bytes], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_prompt_token_lock = threading.Lock()
+
+
+def _tokenize_prompt(model_id: str, tokenizer, prompt: str) -> Dict[str, Any]:
+    """
+    tokenizer(prompt, return_tensors="pt"), memoized per (model, prompt).
+    Returns CPU tensors; callers copy them to the device (never mutate).
+    """
+    key = (model_id, hashlib.sha1(prompt.encode("utf-8")).digest())
+    now = time.monotonic()
+
+    with _prompt_token_lock:
+        entry = _prompt_token_cache.get(key)
+        if entry is not None and now - entry[0] <= PROMPT_TOKEN_CACHE_TTL_SEC:
+            _prompt_token_cache.move_to_end(key)
+            return entry[1]
+
+    inputs = dict(tokenizer(prompt, return_tensors="pt"))
+
+    with _prompt_token_lock:
+        _prompt_token_cache[key] = (now, inputs)
+        _prompt_token_cache.move_to_end(key)
+        while len(_prompt_token_cache) > PROMPT_TOKEN_CACHE_SIZE:
+            _prompt_token_cache.popitem(last=False)
+
+    return inputs
+
+
+class _QueueStreamer(BaseStreamer):
+    """
+    Minimal TextIteratorStreamer replacement.
+
+    - SimpleQueue (no Condition/timeout machinery per token)
+    - put() only hands token ids to a decode thread → BPE decode runs
+      alongside the next forward pass, not on the model thread
+    - Decodes every HF_DECODE_EVERY tokens (or whatever piled up meanwhile)
+    - Holds back text ending in an incomplete multi-byte char
+    - Resets its decode window at newlines (bounded re-decode cost)
+    """
+
+    def __init__(self, tokenizer, decode_every: int = HF_DECODE_EVERY):
+        self.tokenizer = tokenizer
+        self.decode_every = max(1, decode_every)
+        self.queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._ids: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._prompt_pending = True
+        self._ended = False
+        self._token_ids: list = []
+        self._printed = 0
+        self._unflushed = 0
+
+        self._decoder = threading.Thread(
+            target=self._decode_loop,
+            name="hf-decode",
+            daemon=True,
+        )
+        self._decoder.start()
+
+    # ---------------- model thread ----------------
+
+    def put(self, value) -> None:
+        if self._prompt_pending:
+            # First put() is the prompt itself (skip_prompt semantics)
+            self._prompt_pending = False
+            return
+
+        if value.dim() > 1:
+            value = value[0]
+        self._ids.put(value.tolist())
+
+    def fail(self, error: Exception) -> None:
+        # Routed through the decoder → surfaces after already-decoded text
+        self._ids.put(error)
+
+    def end(self) -> None:
+        if not self._ended:
+            self._ended = True
+            self._ids.put(_STREAM_END)
+
+    def is_alive(self) -> bool:
+        return self._decoder.is_alive()
+
+    # ---------------- decode thread ----------------
+
+    def _decode_loop(self) -> None:
+        try:
+            while True:
+                item = self._ids.get()
+
+                # Drain whatever the model produced while we were decoding
+                while True:
+                    if item is _STREAM_END:
+                        self._flush(final=True)
+                        return
+                    if isinstance(item, Exception):
+                        self._flush(final=True)
+                        self.queue.put(item)
+                    else:
+                        self._token_ids.extend(item)
+                        self._unflushed += len(item)
+                    try:
+                        item = self._ids.get_nowait()
+                    except queue.Empty:
+                        break
+
+                if self._unflushed >= self.decode_every:
+                    self._flush(final=False)
+        except Exception as e:
+            self.queue.put(e)
+        finally:
+            self.queue.put(_STREAM_END)
+
+    def _flush(self, final: bool) -> None:
+        if not self._token_ids:
+            return
+
+        text = self.tokenizer.decode(self._token_ids, skip_special_tokens=True)
+
+        if not final and text.endswith("\ufffd"):
+            return  # wait for the rest of the character
+
+        out = text[self._printed:]
+        self._unflushed = 0
+
+        if final or text.endswith("\n"):
+            self._token_ids = []
+            self._printed = 0
+        else:
+            self._printed = len(text)
+
+        if out:
+            self.queue.put(out)
+
+
+class _AbortCriteria(StoppingCriteria):
+    """
+    Stops model.generate itself on abort (not just the consumer loop).
+    """
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.calls = 0
+
+    def __call__(self, input_ids, scores, **kwargs):
+        self.calls += 1
+        aborted = (
+            self.calls % ABORT_CHECK_EVERY == 0
+            and is_aborted(self.session_id)
+        )
+        return torch.full(
+            (input_ids.shape[0],),
+            aborted,
+            dtype=torch.bool,
+            device=input_ids.device,
+        )
+
+
 def hf_stream_generate(
     model_id: str,
     prompt: str,
@@ -240,13 +516,14 @@ def hf_stream_generate(
 ) -> Generator[str, None, None]:
     """
     PHASE-2 SAFE:
-    - Short thread.join after abort
+    - Generation stops on abort (stopping criteria)
+    - Worker death / errors end the stream (no 300s hang)
     - Never crashes streamer
     """
     model, tokenizer = _load_hf(model_id)
 
-    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, timeout=300)
-    inputs = tokenizer(prompt, return_tensors="pt")
+    streamer = _QueueStreamer(tokenizer)
+    inputs = _tokenize_prompt(model_id, tokenizer, prompt)
 
     try:
         inputs = {k: v.to(model.device) for k, v in inputs.items()}
@@ -261,23 +538,51 @@ def hf_stream_generate(
         pad_token_id=tokenizer.eos_token_id,
     )
 
-    thread = threading.Thread(
-        target=model.generate,
-        kwargs=kwargs,
-        daemon=True,
-    )
+    if session_id and StoppingCriteriaList is not None:
+        kwargs["stopping_criteria"] = StoppingCriteriaList([_AbortCriteria(session_id)])
+
+    # Compiled models share one static KV cache → one generate at a time
+    generate_lock = _hf_generate_locks.get(model_id)
+
+    def _run() -> None:
+        try:
+            # No autograd tape / version counters for any decode step
+            with generate_lock or nullcontext(), torch.inference_mode():
+                model.generate(**kwargs)
+        except Exception as e:
+            streamer.fail(e)
+        finally:
+            streamer.end()
+
+    thread = threading.Thread(target=_run, daemon=True)
     thread.start()
+    received = 0
 
     try:
-        for token in streamer:
-            if session_id and is_aborted(session_id):
+        while True:
+            try:
+                item = streamer.queue.get(timeout=HF_STREAM_POLL_SEC)
+            except queue.Empty:
+                if not thread.is_alive() and not streamer.is_alive():
+                    break
+                if session_id and is_aborted(session_id):
+                    break
+                continue
+
+            if item is _STREAM_END:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            received += 1
+            if session_id and received % ABORT_CHECK_EVERY == 0 and is_aborted(session_id):
                 print(f"[HF] Abort detected for session {session_id}")
                 try:
                     thread.join(timeout=0.2)
                 except Exception:
                     pass
                 break
-            yield token
+            yield item
     except Exception:
         traceback.print_exc()
         yield ""
@@ -301,10 +606,10 @@ def load_intent_classifier():
         if _intent_classifier is not None:
             return _intent_classifier
 
-        print("Loading intent classifier [bart-large-mnli]…")
+        print(f"Loading intent classifier [{INTENT_CLASSIFIER_MODEL}]…")
         device_id = 0 if DEVICE == "cuda" else -1
 
-        _intent_classifier = pipeline(
+        classifier = pipeline(
             task="zero-shot-classification",
             model=INTENT_CLASSIFIER_MODEL,
             device=device_id,
@@ -312,6 +617,19 @@ def load_intent_classifier():
             local_files_only=True,
         )
 
+        if DEVICE == "cpu" and INTENT_CLASSIFIER_INT8:
+            # FP32 → INT8 weights for every nn.Linear: ~4x smaller matmuls,
+            # VNNI/AVX2 int8 kernels on x86. Labels only need an argmax.
+            try:
+                classifier.model = torch.ao.quantization.quantize_dynamic(
+                    classifier.model,
+                    {torch.nn.Linear},
+                    dtype=torch.qint8,
+                )
+            except Exception as e:
+                print(f"Intent classifier INT8 quantization skipped: {e}")
+
+        _intent_classifier = classifier
         print("Intent classifier loaded")
         return _intent_classifier
 
@@ -10,12 +10,29 @@ GUARANTEES:
 - Correct rate + concurrency accounting
 """
 
+import os
+import queue
 import time
 import threading
-import json
-from typing import Generator, Optional
+from collections import deque
+from functools import lru_cache
+from typing import Callable, Deque, Dict, Generator, NamedTuple, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except Exception:
+    import json
+
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
 
 from backend.llm.net_models import (
     get_active_net_provider,
@@ -25,17 +42,30 @@ from backend.llm.net_models import (
     NET_MAX_CONCURRENT_STREAMS,
 )
 
-from backend.secrets.net_keys import get_net_api_key
+from backend.secrets.net_keys import get_net_api_key_cached
+from backend.utils.log import get_logger
+
+
+logger = get_logger(__name__)
 
 
 # ============================================================
 # GLOBAL STATE (RATE / CONCURRENCY)
 # ============================================================
 
-_request_timestamps: list[float] = []
-_active_streams: int = 0
+# Sliding 60s window; popleft() is O(1) (list.pop(0) shifted every entry)
+_request_timestamps: Deque[float] = deque()
 _lock = threading.Lock()
 
+# Concurrent-stream gate: explicit counter + Condition (not a Semaphore)
+# so the cap can be resized at runtime via set_max_streams()
+_slot_cond = threading.Condition()
+_slots_in_use: int = 0
+_max_slots: int = NET_MAX_CONCURRENT_STREAMS
+
+# How long a request may queue for a free stream slot (0 = fail fast)
+NET_SLOT_WAIT_SEC = float(os.getenv("NET_SLOT_WAIT_SEC", "0"))
+
 
 # ============================================================
 # ERRORS
@@ -62,183 +92,330 @@ class NetProviderError(Exception):
 # ============================================================
 
 def _acquire_stream_slot() -> None:
-    global _active_streams
-    now = time.time()
+    global _slots_in_use
+
+    with _slot_cond:
+        if not _slot_cond.wait_for(
+            lambda: _slots_in_use < _max_slots,
+            timeout=NET_SLOT_WAIT_SEC,
+        ):
+            raise NetRateLimitError("Too many concurrent Net streams")
+        _slots_in_use += 1
 
+    # RPM is charged only once a slot is held (rejected requests don't count)
+    now = time.time()
     with _lock:
         one_min_ago = now - 60
         while _request_timestamps and _request_timestamps[0] < one_min_ago:
-            _request_timestamps.pop(0)
-
-        if len(_request_timestamps) >= NET_MAX_REQUESTS_PER_MIN:
-            raise NetRateLimitError("KavinBase Net RPM limit exceeded")
+            _request_timestamps.popleft()
 
-        if _active_streams >= NET_MAX_CONCURRENT_STREAMS:
-            raise NetRateLimitError("Too many concurrent Net streams")
+        if len(_request_timestamps) < NET_MAX_REQUESTS_PER_MIN:
+            _request_timestamps.append(now)
+            return
 
-        _request_timestamps.append(now)
-        _active_streams += 1
+    _release_stream_slot()
+    raise NetRateLimitError("KavinBase Net RPM limit exceeded")
 
 
 def _release_stream_slot() -> None:
-    global _active_streams
-    with _lock:
-        _active_streams = max(0, _active_streams - 1)
+    global _slots_in_use
+    with _slot_cond:
+        _slots_in_use = max(0, _slots_in_use - 1)
+        _slot_cond.notify()
+
+
+def set_max_streams(n: int) -> None:
+    """
+    Resize the concurrent-stream cap at runtime.
+    Raising it wakes queued requests; lowering it lets in-flight
+    streams finish and only blocks new ones.
+    """
+    global _max_slots
+    with _slot_cond:
+        _max_slots = max(1, int(n))
+        _slot_cond.notify_all()
 
 
 # ============================================================
-# GROQ STREAM
+# SSE PARSING
 # ============================================================
 
-def _groq_stream(
-    prompt: str,
-    model: str,
-    max_tokens: int,
-) -> Generator[str, None, None]:
+def _parse_sse_delta(data: bytes) -> Optional[str]:
+    """
+    Content delta of one OpenAI-style SSE chunk (the bytes after
+    "data:"), or None for malformed / content-less chunks.
+    """
+    try:
+        chunk = _json_loads(data)
+        delta = chunk.get("choices", [{}])[0].get("delta", {}).get("content")
+    except Exception:
+        return None
 
-    api_key = get_net_api_key("groq")
-    if not api_key:
-        raise NetAuthError("Groq API key missing")
+    return delta if isinstance(delta, str) else None
 
-    url = "https://api.groq.com/openai/v1/chat/completions"
 
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": max_tokens,
-        "temperature": 0.2,
-        "stream": True,
-    }
+_SSE_DATA = b"data: "
+_SSE_DONE = b"data: [DONE]"
 
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
 
-    response = requests.post(
-        url,
-        headers=headers,
-        json=payload,
-        stream=True,
-        timeout=60,
-    )
+def _iter_sse_lines(response) -> Generator[bytes, None, None]:
+    """
+    Split a streamed body into lines with one bytearray buffer.
 
-    if response.status_code == 401:
-        response.close()
-        raise NetAuthError("Invalid Groq API key")
+    iter_content(chunk_size=None) hands over whatever each network read
+    returned (often several SSE records at once), so the per-line work
+    is a single find() + slice instead of iter_lines' per-chunk
+    splitlines() and pending-line bookkeeping.
+    """
+    buf = bytearray()
 
-    if response.status_code == 429:
-        response.close()
-        raise NetRateLimitError("rate_limited:groq")
+    for chunk in response.iter_content(chunk_size=None):
+        buf += chunk
+        start = 0
+        while True:
+            nl = buf.find(b"\n", start)
+            if nl < 0:
+                break
+            yield bytes(buf[start:nl]).rstrip(b"\r")
+            start = nl + 1
+        if start:
+            del buf[:start]
 
-    if response.status_code >= 400:
-        text = response.text
-        response.close()
-        raise NetProviderError(f"Groq API error [{response.status_code}]: {text}")
+    if buf:
+        yield bytes(buf).rstrip(b"\r")
 
-    try:
-        for raw in response.iter_lines(decode_unicode=True):
-            if not raw or not raw.startswith("data:"):
-                continue
 
-            data = raw[5:].strip()
-            if data == "[DONE]":
-                break
+# ============================================================
+# OPENAI-COMPATIBLE STREAM (GROQ / XAI)
+# ============================================================
 
-            try:
-                chunk = json.loads(data)
-            except Exception:
-                continue
+class _ProviderSpec(NamedTuple):
+    url: str
+    key_missing: str
+    key_invalid: str
+    rate_limited: str
+    api_error: str
+
+
+def _provider_spec(provider: str, name: str, url: str) -> _ProviderSpec:
+    # Every provider-specific literal is formatted here, once at import
+    return _ProviderSpec(
+        url=url,
+        key_missing=f"{name} API key missing",
+        key_invalid=f"Invalid {name} API key",
+        rate_limited=f"rate_limited:{provider}",
+        api_error=f"{name} API error",
+    )
 
-            delta = (
-                chunk.get("choices", [{}])[0]
-                .get("delta", {})
-                .get("content")
-            )
 
-            if isinstance(delta, str) and delta:
-                yield delta
+_PROVIDERS: Dict[str, _ProviderSpec] = {
+    "groq": _provider_spec("groq", "Groq", "https://api.groq.com/openai/v1/chat/completions"),
+    "xai": _provider_spec("xai", "xAI", "https://api.x.ai/v1/chat/completions"),
+}
 
-    finally:
-        response.close()
 
+# Request fields that never vary between calls
+_PAYLOAD_TEMPLATE = {
+    "temperature": 0.2,
+    "stream": True,
+}
+
+
+@lru_cache(maxsize=8)
+def _auth_headers(api_key: str) -> Dict[str, str]:
+    # requests copies into its own CaseInsensitiveDict → safe to share
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
 
-# ============================================================
-# XAI STREAM
-# ============================================================
 
-def _xai_stream(
+# Shared keep-alive pools (one per provider host) → the TLS handshake
+# happens once per connection, not once per chat
+_SESSION = requests.Session()
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=max(8, NET_MAX_CONCURRENT_STREAMS),
+        max_retries=0,
+    ),
+)
+
+
+def _open_openai_compatible(
+    provider: str,
     prompt: str,
     model: str,
     max_tokens: int,
-) -> Generator[str, None, None]:
+) -> requests.Response:
+    """
+    POST the streaming completion; returns the open response (2xx only).
+    """
 
-    api_key = get_net_api_key("xai")
-    if not api_key:
-        raise NetAuthError("xAI API key missing")
+    spec = _PROVIDERS[provider]
 
-    url = "https://api.x.ai/v1/chat/completions"
+    api_key = get_net_api_key_cached(provider)
+    if not api_key:
+        raise NetAuthError(spec.key_missing)
 
     payload = {
+        **_PAYLOAD_TEMPLATE,
         "model": model,
-        "messages": [{"role": "user", "content": prompt}],
         "max_tokens": max_tokens,
-        "temperature": 0.2,
-        "stream": True,
-    }
-
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
+        "messages": [{"role": "user", "content": prompt}],
     }
 
-    response = requests.post(
-        url,
-        headers=headers,
-        json=payload,
+    response = _SESSION.post(
+        spec.url,
+        headers=_auth_headers(api_key),
+        # Pre-serialized (orjson) body; Content-Type comes from _auth_headers
+        data=_json_dumps(payload),
         stream=True,
         timeout=60,
     )
 
     if response.status_code == 401:
         response.close()
-        raise NetAuthError("Invalid xAI API key")
+        raise NetAuthError(spec.key_invalid)
 
     if response.status_code == 429:
         response.close()
-        raise NetRateLimitError("rate_limited:xai")
-
+        raise NetRateLimitError(spec.rate_limited)
 
     if response.status_code >= 400:
         text = response.text
         response.close()
-        raise NetProviderError(f"xAI API error [{response.status_code}]: {text}")
+        raise NetProviderError(f"{spec.api_error} [{response.status_code}]: {text}")
+
+    return response
 
+
+def _openai_compatible_stream(response: requests.Response) -> Generator[str, None, None]:
     try:
-        for raw in response.iter_lines(decode_unicode=True):
-            if not raw or not raw.startswith("data:"):
+        for raw in _iter_sse_lines(response):
+            if raw.startswith(_SSE_DATA):
+                if raw == _SSE_DONE:
+                    break
+                data = raw[6:]  # orjson skips any trailing whitespace itself
+            elif raw.startswith(b"data:"):
+                # Spec allows no space after the colon (not seen from Groq/xAI)
+                data = raw[5:].strip()
+                if data == b"[DONE]":
+                    break
+            else:
                 continue
 
-            data = raw[5:].strip()
-            if data == "[DONE]":
-                break
+            delta = _parse_sse_delta(data)
+            if delta:
+                yield delta
+
+    finally:
+        response.close()
 
+
+# ============================================================
+# BUFFERED FORWARDING
+# ============================================================
+
+# Deltas the SSE reader may run ahead of the consumer
+NET_STREAM_BUFFER = int(os.getenv("NET_STREAM_BUFFER", "64"))
+_BUFFER_PUT_POLL_SEC = 0.25
+# Max wait for the reader to exit once its response has been closed
+_READER_JOIN_SEC = 1.0
+
+_BUFFER_END = object()
+
+
+def _buffered(
+    source: Generator[str, None, None],
+    close: Optional[Callable[[], None]] = None,
+    maxsize: int = NET_STREAM_BUFFER,
+) -> Generator[str, None, None]:
+    """
+    Run `source` on a reader thread behind a bounded queue.
+
+    - Reader keeps draining the provider socket while the consumer is
+      busy (jitter absorbed by `maxsize` deltas)
+    - A full queue backpressures the reader (bounded memory)
+    - Reader errors re-raise in the consumer, after buffered deltas
+    - Consumer close/abort stops the reader, calls `close` (the provider
+      response: unblocks a read stalled on the socket) and joins the
+      reader briefly, so the stream is really gone before the caller
+      releases its slot
+    """
+    buf: "queue.Queue[object]" = queue.Queue(maxsize=max(1, maxsize))
+    stop = threading.Event()
+
+    def _put(item: object) -> bool:
+        while not stop.is_set():
             try:
-                chunk = json.loads(data)
-            except Exception:
+                buf.put(item, timeout=_BUFFER_PUT_POLL_SEC)
+                return True
+            except queue.Full:
                 continue
+        return False
+
+    def _read() -> None:
+        try:
+            for delta in source:
+                if not _put(delta):
+                    break
+        except Exception as e:
+            _put(e)
+        finally:
+            source.close()
+            _put(_BUFFER_END)
+
+    reader = threading.Thread(target=_read, name="net-sse-reader", daemon=True)
+    reader.start()
 
-            delta = (
-                chunk.get("choices", [{}])[0]
-                .get("delta", {})
-                .get("content")
-            )
+    try:
+        while True:
+            item = buf.get()
+            if item is _BUFFER_END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+        reader.join(timeout=_READER_JOIN_SEC)
 
-            if isinstance(delta, str) and delta:
-                yield delta
 
+COALESCE_MAX_CHARS = 256
+
+
+def _coalesce_deltas(
+    deltas: Generator[str, None, None],
+    coalesce_ms: float,
+) -> Generator[str, None, None]:
+    budget = coalesce_ms / 1000.0
+    buf: list = []
+    size = 0
+    last_flush = time.monotonic()
+
+    try:
+        for delta in deltas:
+            buf.append(delta)
+            size += len(delta)
+
+            now = time.monotonic()
+            if size > COALESCE_MAX_CHARS or now - last_flush >= budget:
+                yield "".join(buf)
+                buf.clear()
+                size = 0
+                last_flush = now
+
+        if buf:
+            yield "".join(buf)
     finally:
-        response.close()
+        deltas.close()
 
 
 # ============================================================
@@ -250,39 +427,50 @@ def generate_net_answer_stream(
     provider: Optional[str] = None,
     variant: str = "default",
     max_tokens: int = NET_MAX_TOKENS,
+    coalesce_ms: float = 0,
 ) -> Generator[str, None, None]:
+    """
+    Stream answer deltas from the active (or given) Net provider.
 
-    if not prompt or not prompt.strip():
+    coalesce_ms > 0 merges deltas that arrive within that budget (or up
+    to COALESCE_MAX_CHARS) into one yield; 0 yields every delta as-is.
+    """
+
+    # isspace() early-exits on the first visible char (no stripped copy)
+    if not prompt or prompt.isspace():
         raise NetUsageError("Prompt cannot be empty")
 
     provider = provider or get_active_net_provider()
     model_id = get_net_model(provider, variant)
     max_tokens = min(max_tokens, NET_MAX_TOKENS)
 
-    start = time.time()
-    print(
-        f"🌐 [NET START] provider={provider} | "
-        f"model={model_id} | variant={variant}"
+    start = time.monotonic()
+    logger.info(
+        "🌐 [NET START] provider=%s | model=%s | variant=%s",
+        provider, model_id, variant,
     )
 
     _acquire_stream_slot()
 
     try:
-        if provider == "groq":
-            yield from _groq_stream(prompt, model_id, max_tokens)
-
-        elif provider == "xai":
-            yield from _xai_stream(prompt, model_id, max_tokens)
-
-        else:
+        if provider not in _PROVIDERS:
             raise NetProviderError(
                 f"Unsupported Net provider '{provider}'"
             )
 
+        response = _open_openai_compatible(provider, prompt, model_id, max_tokens)
+        deltas = _buffered(
+            _openai_compatible_stream(response),
+            close=response.close,
+        )
+        if coalesce_ms > 0:
+            deltas = _coalesce_deltas(deltas, coalesce_ms)
+
+        yield from deltas
+
     finally:
         _release_stream_slot()
-        elapsed = round(time.time() - start, 2)
-        print(
-            f"🌐 [NET END] provider={provider} | "
-            f"model={model_id} | {elapsed}s"
+        logger.info(
+            "🌐 [NET END] provider=%s | model=%s | %.2fs",
+            provider, model_id, time.monotonic() - start,
         )
@@ -10,7 +10,10 @@ Rules:
 """
 
 import os
-from typing import Literal, Dict, List
+import threading
+import time
+from functools import lru_cache
+from typing import Literal, Dict, List, Optional, Tuple
 
 from backend.secrets.net_keys import (
     has_net_api_key,
@@ -39,6 +42,19 @@ NET_MODELS: Dict[NetProvider, Dict[str, str]] = {
     },
 }
 
+# Flat (provider, rank) → model view, built once: one hash lookup per
+# resolution. "default" is the variant name Net streaming asks for.
+_NET_MODELS_FLAT: Dict[tuple, str] = {
+    (provider, rank): model
+    for provider, ranks in NET_MODELS.items()
+    for rank, model in ranks.items()
+}
+_NET_MODELS_FLAT.update({
+    (provider, "default"): ranks["rank_1"]
+    for provider, ranks in NET_MODELS.items()
+})
+_NET_PROVIDERS = frozenset(NET_MODELS)
+
 # ============================================================
 # ENV VARS
 # ============================================================
@@ -61,7 +77,7 @@ def is_valid_net_provider(provider: str) -> bool:
     return provider in NET_MODELS
 
 
-def get_active_net_provider() -> NetProvider:
+def _resolve_active_net_provider() -> NetProvider:
     """
     Resolve active Net provider.
 
@@ -85,23 +101,77 @@ def get_active_net_provider() -> NetProvider:
     return _get_active_provider_from_keys()
 
 
+# Stale-while-revalidate: a resolved provider is served from memory;
+# once older than the TTL it is still served while ONE background
+# thread re-resolves it. Failures are never cached (always re-raised).
+PROVIDER_CACHE_TTL_SEC = 30.0
+
+_provider_cache: Optional[Tuple[NetProvider, float]] = None
+_provider_refreshing = False
+_provider_lock = threading.Lock()
+
+
+def _refresh_active_net_provider() -> NetProvider:
+    global _provider_cache
+    provider = _resolve_active_net_provider()
+    _provider_cache = (provider, time.monotonic())
+    return provider
+
+
+def _background_refresh() -> None:
+    global _provider_cache, _provider_refreshing
+    try:
+        _refresh_active_net_provider()
+    except Exception:
+        _provider_cache = None  # next caller resolves (and raises) inline
+    finally:
+        with _provider_lock:
+            _provider_refreshing = False
+
+
+def get_active_net_provider() -> NetProvider:
+    global _provider_refreshing
+
+    cached = _provider_cache
+    if cached is None:
+        return _refresh_active_net_provider()
+
+    provider, resolved_at = cached
+    if time.monotonic() - resolved_at >= PROVIDER_CACHE_TTL_SEC:
+        with _provider_lock:
+            start = not _provider_refreshing
+            _provider_refreshing = True
+        if start:
+            threading.Thread(
+                target=_background_refresh,
+                name="net-provider-refresh",
+                daemon=True,
+            ).start()
+
+    return provider
+
+
+def invalidate_active_net_provider() -> None:
+    global _provider_cache
+    _provider_cache = None
+
+
 # ============================================================
 # MODEL RESOLUTION
 # ============================================================
 
+@lru_cache(maxsize=16)
 def get_net_model(
     provider: NetProvider,
     rank: Literal["rank_1", "rank_2"] = "rank_1",
 ) -> str:
-    if provider not in NET_MODELS:
-        raise ValueError(f"Unknown Net provider '{provider}'")
-
-    models = NET_MODELS[provider]
+    model = _NET_MODELS_FLAT.get((provider, rank))
+    if model is not None:
+        return model
 
-    if rank not in models:
-        raise ValueError(f"Invalid rank '{rank}' for provider '{provider}'")
-
-    return models[rank]
+    if provider not in _NET_PROVIDERS:
+        raise ValueError(f"Unknown Net provider '{provider}'")
+    raise ValueError(f"Invalid rank '{rank}' for provider '{provider}'")
 
 
 def get_ranked_net_models(provider: NetProvider) -> List[str]:
@@ -120,6 +190,10 @@ def activate_net_provider(provider: NetProvider, api_key: str) -> None:
     os.environ[NET_PROVIDER_ENV] = provider
     set_net_api_key(provider, api_key)
 
+    # Fresh activation → re-resolve provider + models on next use
+    invalidate_active_net_provider()
+    get_net_model.cache_clear()
+
 
 def resolve_active_net_model() -> str:
     provider = get_active_net_provider()
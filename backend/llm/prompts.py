@@ -19,6 +19,18 @@ from typing import List, Dict, Optional
 # UTILS (Moved to top to prevent reference errors)
 # ============================================================
 
+_STOP_MARKERS = (
+    "<|end|>",
+    "<|system|>",
+    "<|user|>",
+    "<|assistant|>",
+    "<|eot_id|>",
+    "REFINED ANSWER:",
+    "END OF RESPONSE",
+)
+
+
+
 def clean_model_output(text: str) -> str:
     """
     Removes model artifacts and meta output safely.
@@ -27,21 +39,15 @@ def clean_model_output(text: str) -> str:
     if not text:
         return ""
 
-    stop_markers = (
-        "<|end|>",
-        "<|system|>",
-        "<|user|>",
-        "<|assistant|>",
-        "<|eot_id|>",
-        "REFINED ANSWER:",
-        "END OF RESPONSE",
-    )
-
-    for marker in stop_markers:
-        if marker in text:
-            text = text.split(marker)[0]  # Take content BEFORE the stop marker
+    # Take content BEFORE the first stop marker: C-level find() per
+    # marker, each bounded by the earliest hit so far, then one slice
+    end = len(text)
+    for marker in _STOP_MARKERS:
+        i = text.find(marker, 0, end)
+        if i >= 0:
+            end = i
 
-    return text.strip()
+    return text[:end].strip()
 
 
 # ============================================================
@@ -157,49 +163,84 @@ Just the text.
 # SHARED BUILDER (DRY Principle)
 # ============================================================
 
+# ============================================================
+# PRECOMPUTED PROMPT PIECES (invariant → built once at import)
+# ============================================================
+
+_NO_CONTEXT_SYSTEM_PROMPT = "You are KavinBase, a helpful assistant. Answer politely. Do not hallucinate."
+_NO_CONTEXT_TEXT = "No document context available."
+
+_SYSTEM_HEADER = "<|start_header_id|>system<|end_header_id|>\n"
+
+# Whole system turn per (persona, verbosity): persona + style
+_SYSTEM_TURN = {
+    (persona_key, style_key): f"{_SYSTEM_HEADER}{persona}\n\n{instruction}\n<|eot_id|>"
+    for persona_key, persona in (
+        ("docs", CORE_SYSTEM_PROMPT),
+        ("cot", COT_SYSTEM_PROMPT),
+        ("no_docs", _NO_CONTEXT_SYSTEM_PROMPT),
+    )
+    for style_key, instruction in STYLE_INSTRUCTIONS.items()
+}
+
+_HISTORY_HEADER = {
+    "user": "<|start_header_id|>user<|end_header_id|>\n",
+    "assistant": "<|start_header_id|>assistant<|end_header_id|>\n",
+}
+
+# User turn: CONTEXT (retrieval order) then QUESTION
+_CONTEXT_OPEN = "<|start_header_id|>user<|end_header_id|>\nCONTEXT:\n"
+_QUESTION_OPEN = "\n\nQUESTION:\n"
+_QUESTION_CLOSE = "<|eot_id|><|start_header_id|>assistant<|end_header_id|>\n"
+
+
 def _build_generic_prompt(question, context_chunks, history, answer_style, is_cot=False):
-    
-    #  FIX Q4: INJECT PAGE NUMBERS INTO CONTEXT
-    if context_chunks:
-        context_lines = []
-        for c in context_chunks:
-            # Extract metadata safely
-            meta = c.get("metadata", {})
-            page = meta.get("page_number", "?")
-            section = meta.get("section", "General")
-            content = c.get("content", "")
-            
-            # Format: [Page 5 | Section: Overview] Content...
-            context_lines.append(f"[Page {page} | Section: {section}]\n{content}")
-            
-        context_text = "\n\n".join(context_lines)
-        system_instruction = COT_SYSTEM_PROMPT if is_cot else CORE_SYSTEM_PROMPT
-    else:
-        # Fallback for "Hi" messages with no docs
-        context_text = "No document context available."
-        system_instruction = "You are KavinBase, a helpful assistant. Answer politely. Do not hallucinate."
 
     # Style
     style_key = getattr(answer_style, "verbosity", "short")
-    style_instruction = STYLE_INSTRUCTIONS.get(style_key, STYLE_INSTRUCTIONS["short"])
+    if style_key not in STYLE_INSTRUCTIONS:
+        style_key = "short"
+
+    # Build Prompt as one flat fragment list → a single join, no
+    # per-chunk / per-message intermediate strings.
+    if context_chunks:
+        persona_key = "cot" if is_cot else "docs"
+    else:
+        # Fallback for "Hi" messages with no docs
+        persona_key = "no_docs"
 
-    # Build Prompt
-    messages = []
-    messages.append(f"<|start_header_id|>system<|end_header_id|>\n{system_instruction}\n\n{style_instruction}\n<|eot_id|>")
+    messages = [_SYSTEM_TURN[(persona_key, style_key)]]
 
     if history:
         for msg in history[-4:]:
-            clean_content = clean_model_output(msg['content'])
             role = "user" if msg['role'] == "user" else "assistant"
-            messages.append(f"<|start_header_id|>{role}<|end_header_id|>\n{clean_content}<|eot_id|>")
+            messages.extend((
+                _HISTORY_HEADER[role],
+                clean_model_output(msg['content']),
+                "<|eot_id|>",
+            ))
 
-    messages.append(f"""<|start_header_id|>user<|end_header_id|>
-CONTEXT:
-{context_text}
+    messages.append(_CONTEXT_OPEN)
 
-QUESTION:
-{question}<|eot_id|><|start_header_id|>assistant<|end_header_id|>
-""")
+    if context_chunks:
+        #  FIX Q4: INJECT PAGE NUMBERS INTO CONTEXT
+        # Format: [Page 5 | Section: Overview]\nContent...
+        # Chunks keep retrieval (relevance) order.
+        sep = ""
+        for c in context_chunks:
+            # Extract metadata safely
+            meta = c.get("metadata", {})
+            messages.extend((
+                sep,
+                "[Page ", str(meta.get("page_number", "?")),
+                " | Section: ", str(meta.get("section", "General")),
+                "]\n", str(c.get("content", "")),
+            ))
+            sep = "\n\n"
+    else:
+        messages.append(_NO_CONTEXT_TEXT)
+
+    messages.extend((_QUESTION_OPEN, question, _QUESTION_CLOSE))
 
     return "".join(messages)
 
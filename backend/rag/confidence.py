@@ -77,9 +77,12 @@ def compute_confidence(
     # --------------------------------------------------------
     # Individual signals
     # --------------------------------------------------------
+    # One "section" lookup per chunk, shared by redundancy + level
+    sections = [s for s in (c.get("section") for c in chunks) if s]
+
     chunk_score = _chunk_count_score(len(chunks))
     similarity_score = _similarity_strength(scores)
-    redundancy_score = _redundancy_score(chunks)
+    redundancy_score = _redundancy_score(sections)
 
     confidence = (
         WEIGHT_CHUNK_COUNT * chunk_score +
@@ -95,15 +98,9 @@ def compute_confidence(
     confidence = max(0.0, min(1.0, confidence))
     confidence = round(confidence, 2)
 
-    sections = {
-        c.get("section")
-        for c in chunks
-        if c.get("section")
-    }
-
     return {
         "confidence": confidence,
-        "level": _confidence_level(confidence, distinct_sections=len(sections)),
+        "level": _confidence_level(confidence, distinct_sections=len(set(sections))),
     }
 
 # ============================================================
@@ -160,12 +157,11 @@ def _similarity_strength(scores: List[float]) -> float:
     return round((0.7 * top + 0.3 * secondary), 2)
 
 
-def _redundancy_score(chunks: List[Dict]) -> float:
+def _redundancy_score(sections: List[str]) -> float:
     """
-    Measures corroboration across document sections.
+    Measures corroboration across document sections
+    (non-empty section per chunk).
     """
-    sections = [c.get("section") for c in chunks if c.get("section")]
-
     if not sections:
         return 0.4
 
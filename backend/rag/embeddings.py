@@ -0,0 +1,48 @@
+# backend/rag/embeddings.py
+
+import os
+from functools import lru_cache
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+PROJECT_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "../..")
+)
+
+HF_CACHE_DIR = os.path.join(PROJECT_ROOT, "models", "hf_cache")
+
+EMBED_MODEL = "BAAI/bge-m3"
+EMBED_DEVICE = os.getenv("EMBED_DEVICE", "cpu")
+
+# sentence-transformers sorts each encode() call by length before
+# batching, so one large call per ingest keeps padding minimal.
+# bge-m3 chunks can be long: keep this modest on CPU.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+
+
+# ============================================================
+# SHARED EMBEDDINGS (ONE MODEL PER PROCESS)
+# ============================================================
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> HuggingFaceEmbeddings:
+    """
+    Shared embedding model for ingest AND retrieval.
+
+    Both paths MUST use the same model + normalization,
+    otherwise stored vectors and query vectors disagree.
+    """
+    return HuggingFaceEmbeddings(
+        model_name=EMBED_MODEL,
+        cache_folder=HF_CACHE_DIR,
+        model_kwargs={"device": EMBED_DEVICE},
+        encode_kwargs={
+            "normalize_embeddings": True,
+            "batch_size": EMBED_BATCH_SIZE,
+            "show_progress_bar": False,
+        },
+    )
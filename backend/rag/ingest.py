@@ -1,26 +1,34 @@
 # backend/rag/ingest.py
 
+import io
 import os
+import csv
 import json
-from typing import List, Dict, Any
+import uuid
+from typing import List, Dict, Any, Optional
 
 import psycopg2
 
 from langchain_postgres import PGVector
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_postgres.vectorstores import DistanceStrategy
 from langchain_core.documents import Document
 
+from backend.rag.embeddings import get_embeddings
+
 # ============================================================
 # GLOBAL CONFIG
 # ============================================================
 
-PROJECT_ROOT = os.path.abspath(
-    os.path.join(os.path.dirname(__file__), "../..")
-)
+COLLECTION_NAME = "rag_documents"
 
-HF_CACHE_DIR = os.path.join(PROJECT_ROOT, "models", "hf_cache")
+# Rows embedded + COPYed per batch (bounds memory for large PDFs)
+INSERT_BATCH_SIZE = 1024
 
-COLLECTION_NAME = "rag_documents"
+# bge-m3 output size (halfvec columns need a fixed dimension)
+EMBEDDING_DIM = 1024
+
+#  Opt-in: store embeddings as FP16 halfvec (needs pgvector >= 0.7)
+USE_HALFVEC = os.getenv("PGVECTOR_HALFVEC", "false").lower() in ("1", "true", "yes")
 
 # ============================================================
 # INTERNAL HELPERS
@@ -31,23 +39,98 @@ def _normalize_conn(conn: str) -> str:
         raise RuntimeError("DB connection string is required")
     return conn.replace("postgresql+psycopg2://", "postgresql://")
 
-def _get_embeddings() -> HuggingFaceEmbeddings:
-    # 🔥 CRITICAL FIX: Matches backend/api/chat.py
-    # Using BGE-M3 allows the system to read massive tables without truncation.
-    return HuggingFaceEmbeddings(
-        model_name="BAAI/bge-m3",
-        cache_folder=HF_CACHE_DIR,
-        model_kwargs={"device": "cpu"}, # Set to "cuda" if you have a GPU
-        encode_kwargs={"normalize_embeddings": True}
-    )
-
 def _get_vector_store(connection_string: str) -> PGVector:
+    # 🔥 CRITICAL FIX: Shared with backend/api/chat.py (BGE-M3, normalized)
     return PGVector.from_existing_index(
-        embedding=_get_embeddings(),
+        embedding=get_embeddings(),
         collection_name=COLLECTION_NAME,
         connection=connection_string,
+        distance_strategy=DistanceStrategy.COSINE,
     )
 
+def _vector_literal(vector: List[float]) -> str:
+    return "[" + ",".join(map(str, vector)) + "]"
+
+
+def _copy_documents(
+    *,
+    connection_string: str,
+    documents: List[Document],
+    company_document_id: str,
+    revision_number: str,
+    batch_size: int = INSERT_BATCH_SIZE,
+) -> None:
+    """
+    Embed + bulk load documents with COPY.
+
+    PGVector.add_documents issues one INSERT per chunk; here each batch
+    of `batch_size` rows is a single COPY, and all batches share ONE
+    transaction (a failed ingest leaves no partial revision behind).
+    Existing rows of the revision are deleted in that same transaction,
+    so re-ingesting a revision (e.g. a retried commit) replaces it.
+    """
+
+    embeddings = get_embeddings()
+    batch_size = max(1, batch_size)
+
+    conn = psycopg2.connect(_normalize_conn(connection_string))
+    try:
+        cur = conn.cursor()
+
+        cur.execute(
+            "SELECT uuid FROM langchain_pg_collection WHERE name = %s",
+            (COLLECTION_NAME,),
+        )
+        row = cur.fetchone()
+        if not row:
+            raise RuntimeError(f"Collection '{COLLECTION_NAME}' not found")
+        collection_id = str(row[0])
+
+        cur.execute(
+            """
+            DELETE FROM langchain_pg_embedding
+            WHERE collection_id = %s
+              AND cmetadata->>'company_document_id' = %s
+              AND cmetadata->>'revision_number' = %s
+            """,
+            (collection_id, company_document_id, str(revision_number)),
+        )
+
+        for start in range(0, len(documents), batch_size):
+            batch = documents[start:start + batch_size]
+            vectors = embeddings.embed_documents(
+                [d.page_content for d in batch]
+            )
+
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            for doc, vector in zip(batch, vectors):
+                writer.writerow((
+                    str(uuid.uuid4()),
+                    collection_id,
+                    _vector_literal(vector),
+                    doc.page_content,
+                    json.dumps(doc.metadata),
+                ))
+            buf.seek(0)
+
+            cur.copy_expert(
+                """
+                COPY langchain_pg_embedding
+                    (id, collection_id, embedding, document, cmetadata)
+                FROM STDIN WITH (FORMAT csv)
+                """,
+                buf,
+            )
+
+        conn.commit()
+        cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
 # ============================================================
 # LOAD DOCUMENTS (FIXED: CAPTURE CHUNK ID)
 # ============================================================
@@ -116,6 +199,7 @@ def ingest_to_pgvector(
     connection_string: str,
     company_document_id: str,
     revision_number: str, #  FIX: Changed to str for enterprise support
+    insert_batch_size: int = INSERT_BATCH_SIZE,
 ) -> None:
     """
     Ingest a document revision into PGVector.
@@ -124,7 +208,8 @@ def ingest_to_pgvector(
     if not documents:
         raise RuntimeError("No documents provided for ingestion")
 
-    vector_store = _get_vector_store(connection_string)
+    # Ensures tables + collection exist (rows are written via COPY below)
+    _get_vector_store(connection_string)
 
     # --------------------------------------------------------
     # 🔒 DEFENSIVE IDENTITY CHECK (FIXED)
@@ -147,13 +232,22 @@ def ingest_to_pgvector(
             )
 
     # --------------------------------------------------------
-    # INGEST
+    # INGEST (BULK COPY)
     # --------------------------------------------------------
 
-    vector_store.add_documents(documents)
+    _copy_documents(
+        connection_string=connection_string,
+        documents=documents,
+        company_document_id=company_document_id,
+        revision_number=revision_number,
+        batch_size=insert_batch_size,
+    )
 
     setup_keyword_search(connection_string)
 
+    if USE_HALFVEC:
+        setup_halfvec_storage(connection_string)
+
 
 # ============================================================
 # METADATA UPDATE (POST-CONFIRMATION)
@@ -237,6 +331,42 @@ def metadata_exists(
     return exists
 
 
+# ============================================================
+# CONTENT HASH LOOKUP (UPLOAD DEDUPE)
+# ============================================================
+
+def find_metadata_by_content_hash(
+    *,
+    connection_string: str,
+    content_sha1: str,
+) -> Optional[Dict[str, Any]]:
+    """
+    Return cmetadata of any chunk ingested from a PDF with these exact bytes.
+    """
+
+    if not content_sha1:
+        return None
+
+    conn = psycopg2.connect(_normalize_conn(connection_string))
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        SELECT cmetadata
+        FROM langchain_pg_embedding
+        WHERE cmetadata->>'content_sha1' = %s
+        LIMIT 1
+        """,
+        (content_sha1,),
+    )
+    row = cur.fetchone()
+
+    cur.close()
+    conn.close()
+
+    return row[0] if row else None
+
+
 # ============================================================
 # KEYWORD SEARCH SUPPORT
 # ============================================================
@@ -268,6 +398,64 @@ def setup_keyword_search(connection_string: str) -> None:
         """
     )
 
+    # Upload dedupe lookups (find_metadata_by_content_hash)
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS
+        langchain_pg_embedding_content_sha1_idx
+        ON langchain_pg_embedding
+        ((cmetadata->>'content_sha1'));
+        """
+    )
+
     conn.commit()
     cur.close()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+
+# ============================================================
+# HALF-PRECISION VECTOR STORAGE (OPT-IN)
+# ============================================================
+
+def setup_halfvec_storage(connection_string: str) -> None:
+    """
+    Convert stored embeddings to halfvec + cosine HNSW index (idempotent).
+
+    FP16 halves the bytes read per distance computation with
+    negligible recall loss for normalized embeddings.
+    """
+
+    conn = psycopg2.connect(_normalize_conn(connection_string))
+    cur = conn.cursor()
+
+    cur.execute(
+        """
+        SELECT format_type(a.atttypid, a.atttypmod)
+        FROM pg_attribute a
+        WHERE a.attrelid = 'langchain_pg_embedding'::regclass
+          AND a.attname = 'embedding'
+        """
+    )
+    row = cur.fetchone()
+
+    if row and not row[0].startswith("halfvec"):
+        cur.execute(
+            f"""
+            ALTER TABLE langchain_pg_embedding
+            ALTER COLUMN embedding TYPE halfvec({EMBEDDING_DIM})
+            USING embedding::halfvec({EMBEDDING_DIM});
+            """
+        )
+
+    cur.execute(
+        """
+        CREATE INDEX IF NOT EXISTS
+        langchain_pg_embedding_embedding_hnsw_idx
+        ON langchain_pg_embedding
+        USING hnsw (embedding halfvec_cosine_ops);
+        """
+    )
+
+    conn.commit()
+    cur.close()
+    conn.close()
@@ -210,6 +210,7 @@ def enrich_chunks(
                     "revision_code": revision_code,
                     "revision_date": revision_date,
                     "document_type": document_type,
+                    "content_sha1": extra_metadata.get("content_sha1"),
                 },
 
                 # -----------------------------
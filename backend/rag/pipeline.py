@@ -18,6 +18,7 @@ from backend.rag.metadata import (
 from backend.rag.ingest import (
     ingest_to_pgvector,
     load_documents,
+    INSERT_BATCH_SIZE,
 )
 from backend.contracts.ui_events import progress_event
 
@@ -41,6 +42,8 @@ def run_pipeline(
     extra_metadata: Dict[str, Any],
     db_connection: Optional[str] = None,
     mode: PipelineMode = "commit",
+    insert_batch_size: int = INSERT_BATCH_SIZE,
+    reuse_pages_from: Optional[str] = None,
 ) -> Generator[dict, None, None]:
     """
     Enterprise RAG ingestion pipeline (OPTIMIZED).
@@ -53,6 +56,8 @@ def run_pipeline(
     OPTIMIZATION:
     - Metadata mode STOPS OCR after Page 1.
     - Metadata mode uses a separate 'page1_preview.json' to avoid corrupting the full cache.
+    - Commit mode can seed from that preview (reuse_pages_from) and
+      resume OCR at the next page instead of re-parsing Page 1.
     """
 
     # --------------------------------------------------
@@ -99,10 +104,21 @@ def run_pipeline(
         print(f"Parsing PDF in Streaming Mode (Mode={mode})...")
         yield from emit_progress(5, "Reading PDF pages…")
         all_elements = []
+        start_page = 1
+
+        #  REUSE: Pages already parsed during phase 1 (metadata preview)
+        if mode == "commit" and reuse_pages_from and Path(reuse_pages_from).exists():
+            with open(reuse_pages_from, "r", encoding="utf-8") as f:
+                all_elements = json.load(f)
+            start_page = max(
+                (el.get("metadata", {}).get("page_number", 0) for el in all_elements),
+                default=0,
+            ) + 1
+            print(f"[PIPELINE] Reusing {len(all_elements)} preview elements → resuming at page {start_page}")
         
         # Consume the generator page-by-page
         print("[PIPELINE] About to call stream_pdf_to_elements()")
-        for batch in stream_pdf_to_elements(pdf_path, str(elements_path)):
+        for batch in stream_pdf_to_elements(pdf_path, str(elements_path), start_page=start_page):
             print(f"[PIPELINE] Preprocess batch received | elements={len(batch)}")
             all_elements.extend(batch)
             
@@ -221,6 +237,7 @@ def run_pipeline(
         connection_string=db_connection,
         company_document_id=company_document_id,
         revision_number=revision_number,
+        insert_batch_size=insert_batch_size,
     )
     
 
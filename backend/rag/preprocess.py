@@ -14,7 +14,11 @@ from unstructured.partition.pdf import partition_pdf
 # Ensure you created backend/rag/resource_planner.py as discussed!
 from backend.rag.resource_planner import get_optimal_strategy, limit_cpu_usage
 
-def stream_pdf_to_elements(pdf_path: str, output_json: str) -> Generator[List[dict], None, None]:
+def stream_pdf_to_elements(
+    pdf_path: str,
+    output_json: str,
+    start_page: int = 1,
+) -> Generator[List[dict], None, None]:
     """
     Generator that processes a PDF page-by-page to save RAM.
     
@@ -24,6 +28,7 @@ def stream_pdf_to_elements(pdf_path: str, output_json: str) -> Generator[List[di
     Args:
         pdf_path (str): Path to the source PDF.
         output_json (str): Target path (used to determine where to save images).
+        start_page (int): 1-based page to start from (earlier pages already parsed).
         
     Yields:
         List[dict]: A batch of processed elements (e.g., one page worth).
@@ -69,7 +74,7 @@ def stream_pdf_to_elements(pdf_path: str, output_json: str) -> Generator[List[di
     elements_buffer = []
 
     # 6. Page-by-Page Processing Loop
-    for i in range(total_pages):
+    for i in range(max(0, start_page - 1), total_pages):
         # A. Create a temporary single-page PDF
         page_writer = PdfWriter()
         page_writer.add_page(reader.pages[i])
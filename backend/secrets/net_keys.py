@@ -11,6 +11,7 @@ Security model:
 - Net provider selection is explicit
 """
 import os
+from functools import lru_cache
 from typing import Dict, Literal
 import json
 from threading import Lock
@@ -102,6 +103,7 @@ def set_net_api_key(provider: NetProvider, api_key: str) -> None:
     with _LOCK:
         _NET_KEYS[provider] = api_key.strip()
         _save_to_disk()
+        invalidate_net_api_key_cache()
 
         # Provider selection is explicit
         os.environ[NET_PROVIDER_ENV] = provider
@@ -119,9 +121,22 @@ def get_net_api_key(provider: NetProvider) -> str:
 
     return key
 
+@lru_cache(maxsize=4)
+def get_net_api_key_cached(provider: NetProvider) -> str:
+    """
+    Lock-free get_net_api_key for the per-request Net path.
+    Every key mutation above calls invalidate_net_api_key_cache().
+    Missing keys raise (and are therefore never cached).
+    """
+    return get_net_api_key(provider)
+
+def invalidate_net_api_key_cache() -> None:
+    get_net_api_key_cached.cache_clear()
+
 def clear_net_api_keys() -> None:
     with _LOCK:
         _NET_KEYS.clear()
+        invalidate_net_api_key_cache()
 
         if SECRET_FILE.exists():
             try:
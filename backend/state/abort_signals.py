@@ -32,6 +32,10 @@ _USE_REDIS = os.getenv("USE_ABORT_REDIS", "0").lower() in ("1", "true", "yes")
 _REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 _REDIS_ABORT_TTL = int(os.getenv("ABORT_REDIS_TTL", "1800"))  # 30 min
 
+# Token loops poll is_aborted() once per this many tokens: a Redis GET
+# per token is wasted work, 8 tokens keeps abort latency well < 100 ms
+ABORT_CHECK_EVERY = max(1, int(os.getenv("ABORT_CHECK_EVERY", "8")))
+
 
 # ============================================================
 # REDIS CLIENT (OPTIONAL)
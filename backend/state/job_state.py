@@ -15,6 +15,11 @@ GUARANTEES:
 - RAG survives backend restart (via DB persistence)
 - ERROR jobs are visible to callers
 - READY jobs are immutable
+
+PERFORMANCE:
+- Job state lives in memory only (reads/writes never hit the DB)
+- Active-document DB writes run AFTER _LOCK is released, so a slow
+  Postgres round-trip never blocks unrelated job lookups
 """
 
 from typing import Dict, Any, List, Optional
@@ -138,6 +143,8 @@ def create_job(
     - Old job is marked ERROR explicitly
     """
 
+    stale_session: Optional[str] = None
+
     with _LOCK:
         if session_id and session_id in _SESSION_JOB_MAP:
             old_job_id = _SESSION_JOB_MAP.pop(session_id)
@@ -147,8 +154,7 @@ def create_job(
                 signal_abort(old_job.session_id)
                 old_job.status = STATUS_ERROR
                 old_job.error = "Replaced by new job"
-                if old_job.session_id:
-                    clear_active_document(old_job.session_id)
+                stale_session = old_job.session_id
 
         metadata = dict(metadata or {})
         missing_fields = list(missing_fields or [])
@@ -172,7 +178,10 @@ def create_job(
         if session_id:
             _SESSION_JOB_MAP[session_id] = job_id
 
-        return job
+    if stale_session:
+        clear_active_document(stale_session)
+
+    return job
 
 
 def bind_session_to_job(session_id: str, job_id: str) -> None:
@@ -291,9 +300,12 @@ def mark_job_error(job_id: str, error: str) -> None:
         job.status = STATUS_ERROR
         job.error = str(error)
 
-        if job.session_id:
-            _SESSION_JOB_MAP.pop(job.session_id, None)
-            clear_active_document(job.session_id)
+        session_id = job.session_id
+        if session_id:
+            _SESSION_JOB_MAP.pop(session_id, None)
+
+    if session_id:
+        clear_active_document(session_id)
 
 
 # ==========================================================
@@ -313,7 +325,7 @@ def clear_job_for_session(session_id: str) -> None:
         if job_id:
             _JOB_STORE.pop(job_id, None)
 
-        clear_active_document(session_id)
+    clear_active_document(session_id)
 
     # 🔥 Abort reset happens ONLY here
     reset_abort_signal(session_id)
@@ -325,7 +337,9 @@ def delete_job(job_id: str) -> None:
     """
     with _LOCK:
         job = _JOB_STORE.get(job_id)
-        if job and job.session_id:
-            clear_active_document(job.session_id)
+        session_id = job.session_id if job else None
 
         _remove_job(job_id)
+
+    if session_id:
+        clear_active_document(session_id)
@@ -0,0 +1,113 @@
+# backend/state/processed_index.py
+"""
+Processed-PDF index (content hash → confirmed metadata).
+
+Design:
+- Keyed by the SHA-1 of the uploaded PDF bytes
+- Written once a document is committed
+- Read on upload to skip the OCR/LLM metadata pass for known content
+- Local SQLite (WAL), survives backend restarts, no network round-trip
+"""
+
+from typing import Any, Dict, Optional
+from pathlib import Path
+import json
+import os
+import sqlite3
+import threading
+
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+_DEFAULT_PATH = Path(__file__).resolve().parents[1] / "storage" / "processed_index.sqlite3"
+_INDEX_PATH = os.getenv("PROCESSED_INDEX_PATH", str(_DEFAULT_PATH))
+
+
+# ============================================================
+# CONNECTION (LAZY, SHARED)
+# ============================================================
+
+_conn: Optional[sqlite3.Connection] = None
+_LOCK = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+
+    if _conn is not None:
+        return _conn
+
+    Path(_INDEX_PATH).parent.mkdir(parents=True, exist_ok=True)
+
+    conn = sqlite3.connect(
+        _INDEX_PATH,
+        check_same_thread=False,
+        isolation_level=None,  # autocommit
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS processed (
+            hash TEXT PRIMARY KEY,
+            metadata_json TEXT NOT NULL,
+            revision INTEGER
+        )
+        """
+    )
+
+    _conn = conn
+    return conn
+
+
+# ============================================================
+# PUBLIC API
+# ============================================================
+
+def is_processed(content_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Return stored metadata for this content hash, or None.
+    Never raises (index is an optimization, not a source of truth).
+    """
+    if not content_hash:
+        return None
+
+    try:
+        with _LOCK:
+            row = _get_conn().execute(
+                "SELECT metadata_json FROM processed WHERE hash = ?",
+                (content_hash,),
+            ).fetchone()
+    except Exception as e:
+        print(f"[PROCESSED INDEX] Lookup failed: {e}")
+        return None
+
+    return json.loads(row[0]) if row else None
+
+
+def mark_processed(
+    content_hash: str,
+    metadata: Dict[str, Any],
+    revision: Optional[int] = None,
+) -> None:
+    """
+    Record (or refresh) confirmed metadata for a committed PDF.
+    """
+    if not content_hash:
+        return
+
+    try:
+        with _LOCK:
+            _get_conn().execute(
+                """
+                INSERT INTO processed (hash, metadata_json, revision)
+                VALUES (?, ?, ?)
+                ON CONFLICT (hash) DO UPDATE SET
+                    metadata_json = excluded.metadata_json,
+                    revision = excluded.revision
+                """,
+                (content_hash, json.dumps(metadata), revision),
+            )
+    except Exception as e:
+        print(f"[PROCESSED INDEX] Write failed: {e}")
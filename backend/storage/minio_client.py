@@ -4,7 +4,6 @@ import os
 from pathlib import Path
 from typing import Optional
 from threading import Lock
-from hashlib import sha256
 
 from minio import Minio
 from minio.error import S3Error
@@ -19,6 +18,13 @@ _BUCKET_LOCK = Lock()
 _minio_client: Optional[Minio] = None
 _bucket_initialized = False
 
+# Multipart chunk size for streamed uploads
+UPLOAD_PART_SIZE = 16 * 1024 * 1024
+
+# Large-file tuning (see multipart_settings)
+LARGE_PART_SIZE = 64 * 1024 * 1024
+MAX_PARALLEL_UPLOADS = 8
+
 
 # ============================================================
 # CONFIG (LAZY, SAFE)
@@ -118,12 +124,20 @@ def _object_path(document_id: str, revision: int, filename: str) -> str:
     return f"{document_id}/v{revision}/{Path(filename).name}"
 
 
-def _checksum(path: str) -> str:
-    h = sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+def multipart_settings(file_size: int) -> dict:
+    """
+    Part size / parallelism for a file of `file_size` bytes.
+
+    < 64 MiB  → single PUT (part_size >= file size)
+    larger    → ~16 parts, 2..8 concurrent part uploads
+    """
+    return {
+        "part_size": max(LARGE_PART_SIZE, file_size // 16),
+        "num_parallel_uploads": min(
+            MAX_PARALLEL_UPLOADS,
+            max(2, file_size // (256 * 1024 * 1024)),
+        ),
+    }
 
 
 # ============================================================
@@ -163,7 +177,16 @@ def upload_pdf(
     revision: int,
     filename: str,
     overwrite: bool = False,
+    checksum: Optional[str] = None,
+    part_size: int = UPLOAD_PART_SIZE,
+    num_parallel_uploads: int = 3,
 ) -> str:
+    """
+    Stream a local PDF to MinIO (no full read into memory).
+
+    checksum: optional precomputed content hash stored as object
+    metadata. It is NOT computed here, to avoid a second full read.
+    """
     client = get_minio_client()
     if not client:
         raise RuntimeError("MinIO not configured")
@@ -173,7 +196,13 @@ def upload_pdf(
 
     bucket = conf["bucket"]
     object_name = _object_path(document_id, revision, filename)
-    checksum = _checksum(local_path)
+
+    metadata = {
+        "document_id": document_id,
+        "revision": str(revision),
+    }
+    if checksum:
+        metadata["checksum"] = checksum
 
     # 🔥 Atomic overwrite protection via metadata
     try:
@@ -191,11 +220,9 @@ def upload_pdf(
         object_name=object_name,
         file_path=local_path,
         content_type="application/pdf",
-        metadata={
-            "document_id": document_id,
-            "revision": str(revision),
-            "sha256": checksum,
-        },
+        metadata=metadata,
+        part_size=part_size,
+        num_parallel_uploads=num_parallel_uploads,
     )
 
     return f"{bucket}/{object_name}"
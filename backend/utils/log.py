@@ -0,0 +1,59 @@
+# backend/utils/log.py
+
+"""
+Non-blocking logging for request hot paths.
+
+Records are pushed onto an in-process queue (O(enqueue) on the
+caller's thread) and written to stderr by a single background
+listener thread. Use %-style args so messages are only formatted
+when actually emitted:
+
+    logger = get_logger(__name__)
+    logger.info("Receiving Upload: %s", filename)
+"""
+
+import atexit
+import logging
+import logging.handlers
+import queue
+from threading import Lock
+
+_QUEUE: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_LISTENER = None
+_LOCK = Lock()
+
+
+def _ensure_listener() -> None:
+    global _LISTENER
+
+    if _LISTENER is not None:
+        return
+
+    with _LOCK:
+        if _LISTENER is not None:
+            return
+
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+
+        listener = logging.handlers.QueueListener(_QUEUE, handler)
+        listener.start()
+        atexit.register(listener.stop)
+
+        _LISTENER = listener
+
+
+def get_logger(name: str, level: int = logging.INFO) -> logging.Logger:
+    """
+    Logger whose records are emitted off-thread via a QueueListener.
+    """
+    _ensure_listener()
+
+    logger = logging.getLogger(name)
+    if not any(isinstance(h, logging.handlers.QueueHandler) for h in logger.handlers):
+        logger.addHandler(logging.handlers.QueueHandler(_QUEUE))
+        logger.setLevel(level)
+        # Avoid double output through uvicorn's root handlers
+        logger.propagate = False
+
+    return logger
@@ -0,0 +1,115 @@
+# backend/utils/pg.py
+
+"""
+Shared psycopg2 helpers for pooled, prepared-statement access.
+
+- BlockingPool: psycopg2's ThreadedConnectionPool raises PoolError once
+  maxconn connections are checked out; this wrapper makes callers wait
+  for a free connection instead (bounded by a timeout)
+- execute_prepared: server-side PREPARE once per live connection.
+  Prepared state is tracked per connection OBJECT (weak refs, so a
+  closed + replaced connection is never mistaken for a prepared one),
+  and a statement the server no longer knows is re-prepared and retried
+
+No psycopg2 import here: errors are matched by SQLSTATE (pgcode).
+"""
+
+from typing import Any, Callable, Optional, TypeVar
+import threading
+import weakref
+
+
+T = TypeVar("T")
+
+# SQLSTATE codes
+_INVALID_STATEMENT_NAME = "26000"   # prepared statement "..." does not exist
+_DUPLICATE_PREPARED = "42P05"       # prepared statement "..." already exists
+
+
+# ============================================================
+# BLOCKING POOL
+# ============================================================
+
+class BlockingPool:
+    """
+    getconn()/putconn() over a psycopg2 pool, waiting (not raising)
+    while all `maxconn` connections are in use.
+    """
+
+    def __init__(self, pool: Any, maxconn: int, timeout: Optional[float] = None):
+        self._pool = pool
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+
+    def getconn(self) -> Any:
+        if not self._slots.acquire(timeout=self._timeout):
+            raise TimeoutError("Timed out waiting for a pooled DB connection")
+        try:
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn: Any, close: bool = False) -> None:
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+
+# ============================================================
+# PREPARED STATEMENTS
+# ============================================================
+
+_prepared: "weakref.WeakKeyDictionary[Any, set]" = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def _is_prepared(conn: Any, name: str) -> bool:
+    with _prepared_lock:
+        return name in _prepared.get(conn, ())
+
+
+def _mark_prepared(conn: Any, name: str) -> None:
+    with _prepared_lock:
+        _prepared.setdefault(conn, set()).add(name)
+
+
+def _prepare(conn: Any, cur: Any, name: str, prepare_sql: str) -> None:
+    try:
+        cur.execute(prepare_sql)
+    except Exception as e:
+        if getattr(e, "pgcode", None) != _DUPLICATE_PREPARED:
+            raise
+        # Already on the server (session outlived our tracking) → fine
+        if not conn.autocommit:
+            conn.rollback()
+    _mark_prepared(conn, name)
+
+
+def execute_prepared(
+    conn: Any,
+    cur: Any,
+    name: str,
+    prepare_sql: str,
+    run: Callable[[Any], T],
+) -> T:
+    """
+    Ensure `name` is prepared on `conn`, then run(cur) (which issues
+    the EXECUTE). If the server lost the statement, re-PREPARE once and
+    retry. In transactional mode the failed EXECUTE is rolled back first,
+    so `run` must be the only work in the current transaction.
+    """
+    if not _is_prepared(conn, name):
+        _prepare(conn, cur, name, prepare_sql)
+
+    try:
+        return run(cur)
+    except Exception as e:
+        if getattr(e, "pgcode", None) != _INVALID_STATEMENT_NAME:
+            raise
+
+    if not conn.autocommit:
+        conn.rollback()
+    _prepare(conn, cur, name, prepare_sql)
+    return run(cur)
@@ -0,0 +1,44 @@
+import unittest
+
+from backend.llm import answer_cache
+
+
+CHUNKS = [{"id": "1", "content": "Design pressure is 50 bar [Page 12]."}]
+
+
+class AnswerCacheTests(unittest.TestCase):
+    def setUp(self):
+        answer_cache._cache.clear()
+        answer_cache._last_key.clear()
+
+    def _store(self, **overrides):
+        args = dict(model_id="lite", question="design pressure?", chunks=CHUNKS,
+                    max_tokens=1024, intent=None, answer="50 bar")
+        args.update(overrides)
+        answer_cache.store(**args)
+
+    def _lookup(self, **overrides):
+        args = dict(model_id="lite", question="design pressure?", chunks=CHUNKS,
+                    max_tokens=1024, intent=None)
+        args.update(overrides)
+        return answer_cache.lookup(**args)
+
+    def test_hit_for_same_question_and_evidence(self):
+        self._store()
+        self.assertEqual(self._lookup(session_id="a"), "50 bar")
+
+    def test_max_tokens_and_intent_are_part_of_the_key(self):
+        self._store(max_tokens=128, intent="fast", answer="50.")
+        self.assertIsNone(self._lookup(max_tokens=1024, intent=None))
+        self.assertEqual(self._lookup(max_tokens=128, intent="fast"), "50.")
+
+    def test_same_session_asking_again_is_a_retry(self):
+        self._store()
+        self.assertEqual(self._lookup(session_id="a"), "50 bar")
+        self.assertIsNone(self._lookup(session_id="a"))
+        # Other sessions still share the answer
+        self.assertEqual(self._lookup(session_id="b"), "50 bar")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import threading
+import time
+import unittest
+from unittest import mock
+
+try:
+    from backend.llm import loader
+except ImportError:  # torch not installed
+    loader = None
+
+
+class _Ids:
+    """Just enough of a tensor for _QueueStreamer.put()."""
+
+    def __init__(self, ids):
+        self._ids = ids
+
+    def dim(self):
+        return 1
+
+    def tolist(self):
+        return list(self._ids)
+
+
+class _Tokenizer:
+    eos_token_id = 0
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(i) for i in ids)
+
+
+class _StaticCacheModel:
+    """
+    Mimics a compiled model: ONE cache on the model, reset at the start
+    of every generate() and read back for each new token.
+    """
+
+    device = "cpu"
+
+    def __init__(self):
+        self._cache = []
+
+    def generate(self, input_ids, streamer, max_new_tokens, **kwargs):
+        self._cache = []
+        streamer.put(_Ids(input_ids))
+        for _ in range(max_new_tokens):
+            self._cache.append(input_ids[0])
+            time.sleep(0.002)
+            streamer.put(_Ids([self._cache[-1]]))
+        streamer.end()
+
+
+@unittest.skipIf(loader is None, "torch not installed")
+class CompiledGenerateTests(unittest.TestCase):
+    def test_concurrent_streams_on_a_compiled_model_stay_independent(self):
+        model = _StaticCacheModel()
+        prompts = {"a": {"input_ids": [ord("a")]}, "b": {"input_ids": [ord("b")]}}
+        results = {}
+
+        def consume(prompt):
+            results[prompt] = "".join(
+                loader.hf_stream_generate("m", prompt, max_new_tokens=40)
+            )
+
+        with mock.patch.object(loader, "_load_hf", return_value=(model, _Tokenizer())), \
+             mock.patch.object(loader, "_tokenize_prompt", side_effect=lambda m, t, p: prompts[p]), \
+             mock.patch.dict(loader._hf_generate_locks, {"m": threading.Lock()}):
+            threads = [threading.Thread(target=consume, args=(p,)) for p in prompts]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(timeout=10)
+
+        self.assertEqual(results, {"a": "a" * 40, "b": "b" * 40})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+try:
+    from backend.rag import ingest
+    from langchain_core.documents import Document
+except ImportError:  # psycopg2 / langchain not installed
+    ingest = None
+
+
+class _Cursor:
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, sql, params=None):
+        self.log.append((sql.split()[0], params))
+
+    def fetchone(self):
+        return ("collection-uuid",)
+
+    def copy_expert(self, sql, buf):
+        self.log.append(("COPY", len(buf.getvalue().splitlines())))
+
+    def close(self):
+        pass
+
+
+class _Conn:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self):
+        return _Cursor(self.log)
+
+    def commit(self):
+        self.log.append(("COMMIT", None))
+
+    def rollback(self):
+        self.log.append(("ROLLBACK", None))
+
+    def close(self):
+        pass
+
+
+class _Embeddings:
+    def embed_documents(self, texts):
+        return [[0.0, 1.0] for _ in texts]
+
+
+@unittest.skipIf(ingest is None, "ingest dependencies not installed")
+class CopyDocumentsTests(unittest.TestCase):
+    def test_revision_rows_are_replaced_in_the_copy_transaction(self):
+        conn = _Conn()
+        docs = [Document(page_content=f"chunk {i}") for i in range(3)]
+
+        with mock.patch.object(ingest.psycopg2, "connect", return_value=conn), \
+             mock.patch.object(ingest, "get_embeddings", return_value=_Embeddings()):
+            ingest._copy_documents(
+                connection_string="postgresql://",
+                documents=docs,
+                company_document_id="DOC-1",
+                revision_number=2,
+                batch_size=2,
+            )
+
+        self.assertEqual(
+            [op for op, _ in conn.log],
+            ["SELECT", "DELETE", "COPY", "COPY", "COMMIT"],
+        )
+        self.assertEqual(conn.log[1][1], ("collection-uuid", "DOC-1", "2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import time
+import unittest
+
+try:
+    from backend.llm import net_loader
+except ImportError:  # requests not installed
+    net_loader = None
+
+
+class _StalledResponse:
+    """A provider that sends one delta, then never sends another byte."""
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+    def deltas(self, finalized):
+        try:
+            yield "Hello"
+            # Blocked in a socket read until the response is closed
+            self.closed.wait(timeout=10)
+            raise ConnectionError("response closed")
+        finally:
+            finalized.set()
+
+
+@unittest.skipIf(net_loader is None, "requests not installed")
+class BufferedTests(unittest.TestCase):
+    def test_consumer_close_closes_a_stalled_response_before_returning(self):
+        response, finalized = _StalledResponse(), threading.Event()
+        out = net_loader._buffered(response.deltas(finalized), close=response.close)
+
+        self.assertEqual(next(out), "Hello")
+
+        start = time.monotonic()
+        out.close()
+
+        self.assertTrue(response.closed.is_set())
+        self.assertTrue(finalized.is_set())  # reader gone, not just signalled
+        self.assertLess(time.monotonic() - start, 1.0)
+
+    def test_deltas_and_errors_are_forwarded_in_order(self):
+        def source():
+            yield "a"
+            yield "b"
+            raise net_loader.NetProviderError("boom")
+
+        out = net_loader._buffered(source())
+        self.assertEqual([next(out), next(out)], ["a", "b"])
+        with self.assertRaises(net_loader.NetProviderError):
+            next(out)
+
+
+if __name__ == "__main__":
+    unittest.main()
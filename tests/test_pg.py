@@ -0,0 +1,157 @@
+import threading
+import time
+import unittest
+
+from backend.utils.pg import BlockingPool, execute_prepared
+
+
+class FakePgError(Exception):
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+class FakeServerSession:
+    """Prepared statements live on the server session, not the client."""
+
+    def __init__(self):
+        self.prepared = set()
+
+
+class FakeConn:
+    def __init__(self, autocommit=True):
+        self.autocommit = autocommit
+        self.closed = 0
+        self.session = FakeServerSession()
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql.split()[0])
+        if sql.startswith("PREPARE"):
+            if "stmt" in self.conn.session.prepared:
+                raise FakePgError("42P05")
+            self.conn.session.prepared.add("stmt")
+        elif sql.startswith("EXECUTE"):
+            if "stmt" not in self.conn.session.prepared:
+                raise FakePgError("26000")
+
+
+def _run(cur):
+    cur.execute("EXECUTE stmt")
+    return "ok"
+
+
+class FakePool:
+    def __init__(self):
+        self.out = 0
+
+    def getconn(self):
+        self.out += 1
+        return FakeConn()
+
+    def putconn(self, conn, close=False):
+        self.out -= 1
+
+
+class BlockingPoolTests(unittest.TestCase):
+    def test_waits_for_a_free_connection_instead_of_raising(self):
+        pool = BlockingPool(FakePool(), maxconn=1, timeout=5)
+        first = pool.getconn()
+        got = []
+
+        waiter = threading.Thread(target=lambda: got.append(pool.getconn()))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(got, [])  # blocked, not failed
+
+        pool.putconn(first)
+        waiter.join(timeout=5)
+        self.assertEqual(len(got), 1)
+
+    def test_times_out_when_exhausted(self):
+        pool = BlockingPool(FakePool(), maxconn=1, timeout=0.01)
+        pool.getconn()
+        with self.assertRaises(TimeoutError):
+            pool.getconn()
+
+
+class ExecutePreparedTests(unittest.TestCase):
+    def test_prepares_once_per_connection(self):
+        conn = FakeConn()
+        cur = FakeCursor(conn)
+
+        execute_prepared(conn, cur, "stmt", "PREPARE stmt AS SELECT 1", _run)
+        execute_prepared(conn, cur, "stmt", "PREPARE stmt AS SELECT 1", _run)
+
+        self.assertEqual(cur.statements, ["PREPARE", "EXECUTE", "EXECUTE"])
+
+    def test_server_lost_statement_is_reprepared(self):
+        conn = FakeConn(autocommit=False)
+        cur = FakeCursor(conn)
+        execute_prepared(conn, cur, "stmt", "PREPARE stmt AS SELECT 1", _run)
+
+        conn.session.prepared.clear()  # e.g. DISCARD ALL / server restart
+
+        self.assertEqual(
+            execute_prepared(conn, cur, "stmt", "PREPARE stmt AS SELECT 1", _run),
+            "ok",
+        )
+        self.assertEqual(conn.rollbacks, 1)
+
+    def test_closed_and_replaced_connection_is_prepared_again(self):
+        # Pool discards a connection; CPython may hand its id() to the
+        # replacement, which must still get its own PREPARE
+        old = FakeConn(autocommit=False)
+        execute_prepared(old, FakeCursor(old), "stmt", "PREPARE stmt AS SELECT 1", _run)
+        old.closed = 1
+        old_id = id(old)
+        del old
+
+        for _ in range(20):
+            new = FakeConn(autocommit=False)
+            cur = FakeCursor(new)
+            self.assertEqual(
+                execute_prepared(new, cur, "stmt", "PREPARE stmt AS SELECT 1", _run),
+                "ok",
+            )
+            self.assertEqual(cur.statements[0], "PREPARE")
+            self.assertEqual(new.rollbacks, 0)
+            if id(new) == old_id:
+                break
+            del new, cur
+
+    def test_live_connection_recovers_for_every_later_call(self):
+        conn = FakeConn(autocommit=False)
+        cur = FakeCursor(conn)
+        execute_prepared(conn, cur, "stmt", "PREPARE stmt AS SELECT 1", _run)
+        conn.session.prepared.clear()
+
+        for _ in range(3):
+            execute_prepared(conn, cur, "stmt", "PREPARE stmt AS SELECT 1", _run)
+
+        # One failed EXECUTE + re-PREPARE, then steady state
+        self.assertEqual(conn.rollbacks, 1)
+        self.assertEqual(cur.statements.count("PREPARE"), 2)
+
+    def test_other_errors_propagate(self):
+        conn = FakeConn()
+        cur = FakeCursor(conn)
+
+        def boom(cur):
+            raise FakePgError("23505")
+
+        with self.assertRaises(FakePgError):
+            execute_prepared(conn, cur, "stmt", "PREPARE stmt AS SELECT 1", boom)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import time
+import unittest
+
+from backend.contracts.ui_constants import UI_EVENT_PREFIX
+from backend.llm.stream_coalesce import coalesce_tokens
+
+
+def _slow(tokens, gap_sec):
+    for i, t in enumerate(tokens):
+        if i:
+            time.sleep(gap_sec)
+        yield t
+
+
+class CoalesceTokensTests(unittest.TestCase):
+    def test_first_token_is_not_held_for_the_second(self):
+        out = coalesce_tokens(_slow(["Hello", " world"], gap_sec=0.3), max_ms=15)
+
+        start = time.monotonic()
+        first = next(out)
+        self.assertEqual(first, "Hello")
+        self.assertLess(time.monotonic() - start, 0.1)
+
+        self.assertEqual(list(out), [" world"])
+
+    def test_slow_stream_is_passed_through_token_by_token(self):
+        out = list(coalesce_tokens(_slow(["a", "b", "c"], gap_sec=0.05), max_ms=15))
+        self.assertEqual(out, ["a", "b", "c"])
+
+    def test_fast_tokens_are_merged(self):
+        out = list(coalesce_tokens(["a", "b", "c", "d", "e"], max_ms=10_000, max_tokens=2))
+        self.assertEqual(out, ["a", "bc", "de"])
+        self.assertEqual("".join(out), "abcde")
+
+    def test_ui_events_and_empty_chunks_are_never_merged(self):
+        event = UI_EVENT_PREFIX + "{}\n"
+        out = list(coalesce_tokens(["a", "b", event, "c", ""], max_ms=10_000))
+        self.assertEqual(out, ["a", "b", event, "c", ""])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+try:
+    from backend.api import upload
+except ImportError:  # fastapi / langchain not installed
+    upload = None
+
+
+def _slow_pipeline(closed, produced, steps=1000, gap_sec=0.005):
+    def run_pipeline(**kwargs):
+        try:
+            for i in range(steps):
+                produced.append(i)
+                time.sleep(gap_sec)
+                yield {"type": "PROGRESS", "value": i}
+        finally:
+            closed.set()
+
+    return run_pipeline
+
+
+@unittest.skipIf(upload is None, "upload dependencies not installed")
+class StreamPipelineTests(unittest.TestCase):
+    def test_consumer_break_stops_and_closes_the_pipeline(self):
+        closed, produced = threading.Event(), []
+
+        async def consume():
+            events = upload.stream_pipeline()
+            async for _ in events:
+                break
+            await events.aclose()
+
+        with mock.patch.object(upload, "run_pipeline", _slow_pipeline(closed, produced)):
+            asyncio.run(consume())
+
+        self.assertTrue(closed.is_set())
+        self.assertLess(len(produced), 1000)
+
+    def test_cancelled_consumer_waits_for_the_pump(self):
+        closed, produced = threading.Event(), []
+
+        async def consume():
+            async def drain():
+                async for _ in upload.stream_pipeline():
+                    pass
+
+            task = asyncio.create_task(drain())
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # The pipeline generator is closed by the time the task ends
+            self.assertTrue(closed.is_set())
+
+        with mock.patch.object(upload, "run_pipeline", _slow_pipeline(closed, produced)):
+            asyncio.run(consume())
+
+        self.assertLess(len(produced), 1000)
+
+
+@unittest.skipIf(upload is None, "upload dependencies not installed")
+class CommitUploadTests(unittest.TestCase):
+    def test_minio_failure_waits_for_indexing_before_failing(self):
+        closed, produced = threading.Event(), []
+        ready = mock.Mock()
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as pdf:
+            job = SimpleNamespace(
+                status="PROCESSING",
+                missing_fields=[],
+                session_id="s1",
+                metadata={
+                    "pdf_path": pdf.name,
+                    "company_document_id": "DOC-1",
+                    "revision_number": "2",
+                    "source_file": "doc.pdf",
+                    "db_connection": "postgresql://",
+                },
+            )
+            payload = SimpleNamespace(job_id="j1", metadata={}, force=False)
+
+            async def commit():
+                with self.assertRaises(upload.HTTPException):
+                    await upload.commit_upload(payload)
+                # The pipeline branch was stopped AND finished before the 500
+                self.assertTrue(closed.is_set())
+
+            with mock.patch.object(upload, "get_job_state", return_value=job), \
+                 mock.patch.object(upload, "minio_upload_pdf", side_effect=RuntimeError("minio down")), \
+                 mock.patch.object(upload, "multipart_settings", return_value={}), \
+                 mock.patch.object(upload, "run_pipeline", _slow_pipeline(closed, produced)), \
+                 mock.patch.object(upload, "mark_job_ready", ready):
+                asyncio.run(commit())
+
+        ready.assert_not_called()
+        self.assertLess(len(produced), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()